@@ -0,0 +1,124 @@
+"""
+Session results table for the Streamlit app.
+
+Every generated ad becomes one row of a single DataFrame (time, product,
+language, variant rank and score, then one column per ad component). The app
+shows it a page at a time instead of rendering widgets per component. An
+export (CSV, JSON lines or XLSX) is written in chunks into one buffer only
+when the user asks for it and handed straight to the download button, which
+holds it for that run only; nothing is kept in the session state.
+"""
+import io
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+from ad_validation import FIELD_LIMITS
+
+META_COLUMNS = ['generated_at', 'product', 'language', 'variant', 'score']
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = MappingProxyType({
+    'CSV': ('csv', 'text/csv'),
+    'JSONL': ('jsonl', 'application/x-ndjson'),
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+})
+EXPORT_CHUNK_ROWS = 5000
+
+
+class AdResults:
+    """
+    All ads generated in a session as one DataFrame.
+
+    New rows are buffered as dicts and folded into the frame the next time
+    it is read, so adding a batch costs one concat instead of one per ad.
+    """
+    def __init__(self):
+        self._frame = None
+        self._pending: List[Dict] = []
+
+    def add(self, product: str, language: str, ad: Dict[str, str], variant: int = 1,
+            score: Optional[float] = None) -> None:
+        """Append one generated ad"""
+        self._pending.append({
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'product': product,
+            'language': language,
+            'variant': variant,
+            'score': score,
+            **ad,
+        })
+
+    def __len__(self) -> int:
+        return (0 if self._frame is None else len(self._frame)) + len(self._pending)
+
+    @property
+    def frame(self):
+        """The results DataFrame, metadata columns first, then components"""
+        import pandas as pd
+
+        if self._pending:
+            new = pd.DataFrame.from_records(self._pending)
+            self._pending = []
+            frame = new if self._frame is None else pd.concat([self._frame, new], ignore_index=True)
+            known = [column for column in META_COLUMNS + list(FIELD_LIMITS) if column in frame.columns]
+            self._frame = frame[known + [column for column in frame.columns if column not in known]]
+        if self._frame is None:
+            return pd.DataFrame(columns=META_COLUMNS + list(FIELD_LIMITS))
+        return self._frame
+
+    def select(self, product: Optional[str] = None, language: Optional[str] = None):
+        """Rows whose product contains ``product`` and whose language matches"""
+        frame = self.frame
+        if language:
+            frame = frame[frame['language'] == language]
+        if product:
+            frame = frame[frame['product'].str.contains(product, case=False, regex=False, na=False)]
+        return frame
+
+
+def page_count(rows: int, page_size: int) -> int:
+    """Number of pages needed for ``rows`` (at least one)"""
+    return max(1, -(-rows // page_size))
+
+
+def write_export(frame, export_format: str, out, chunk_rows: int = EXPORT_CHUNK_ROWS) -> None:
+    """
+    Write ``frame`` to the binary file ``out`` as CSV, JSONL or XLSX,
+    ``chunk_rows`` rows at a time
+    """
+    chunks = (frame.iloc[start:start + chunk_rows] for start in range(0, len(frame), chunk_rows))
+
+    if export_format == 'CSV':
+        out.write(b'\xef\xbb\xbf')  # BOM so spreadsheet apps detect UTF-8
+        out.write(frame.iloc[:0].to_csv(index=False).encode('utf-8'))
+        for chunk in chunks:
+            out.write(chunk.to_csv(index=False, header=False).encode('utf-8'))
+    elif export_format == 'JSONL':
+        for chunk in chunks:
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            out.write((text if text.endswith('\n') else text + '\n').encode('utf-8'))
+    elif export_format == 'XLSX':
+        try:
+            import xlsxwriter
+        except ImportError:
+            raise ImportError("xlsxwriter package not installed. Run: pip install xlsxwriter")
+        # constant_memory flushes each row to disk once the next one starts
+        workbook = xlsxwriter.Workbook(out, {'constant_memory': True})
+        sheet = workbook.add_worksheet('Ads')
+        sheet.write_row(0, 0, list(frame.columns))
+        row = 1
+        for chunk in chunks:
+            for values in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+                sheet.write_row(row, 0, values)
+                row += 1
+        workbook.close()
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+
+def export_bytes(frame, export_format: str) -> bytes:
+    """Export ``frame`` in one of EXPORT_FORMATS and return the file contents"""
+    buffer = io.BytesIO()
+    write_export(frame, export_format, buffer)
+    return buffer.getvalue()
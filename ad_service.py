@@ -0,0 +1,458 @@
+"""
+Headless HTTP service for AdGenerator.
+
+Exposes ad generation to other services without going through the Streamlit
+UI. The app is a plain ASGI callable, so any ASGI server can host it:
+
+    python ad_service.py --port 8000
+    uvicorn ad_service:app --port 8000
+
+Endpoints:
+    POST /generate        {"product": "...", "language": "English", "variants": 1, "top_k": 1}
+    POST /generate/batch  {"items": [{"product": "...", "language": "..."}], "fix_lengths": false,
+                           "variants": 1, "top_k": 1}
+    GET  /health
+    GET  /metrics
+
+All generations share one pooled OpenAI client. Identical in-flight
+(product, language) requests are coalesced into a single model call, and a
+fixed worker pool with room for queue_size waiting generations rejects excess
+load with 503 instead of letting latency grow without limit.
+
+Batch results are checked against the per-field character limits in one
+vectorized pass (see ad_validation.py). Over-limit fields are reported per
+item, or regenerated when the request sets "fix_lengths".
+
+With "variants" above 1, each ad is generated as that many alternatives in
+one completion call and ranked locally (see ad_variants.py); the response
+carries the top_k of them and the best one as "ad".
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
+
+from ad_text_generator import AdGenerator, AdGenerationError, LANGUAGE_CODES, LANGUAGE_NAMES, MAX_AD_VARIANTS
+from ad_validation import ads_frame, describe_violations, validate_ads
+from single_flight import AsyncSingleFlight
+from structured_logging import setup_logging, request_context, log_timing
+
+logger = logging.getLogger(__name__)
+
+# Service defaults, overridable through the environment
+SERVICE_DEFAULTS = {
+    'AD_SERVICE_WORKERS': 8,
+    'AD_SERVICE_QUEUE_SIZE': 100,
+    'AD_SERVICE_MAX_BATCH': 50,
+    'AD_SERVICE_TIMEOUT': 60,
+}
+
+
+class ServiceBusyError(Exception):
+    """Raised when the generation queue is full"""
+
+
+class AdService:
+    """
+    Bounded worker pool with request coalescing in front of an AdGenerator
+    """
+
+    def __init__(
+        self,
+        generator: AdGenerator,
+        workers: int = 8,
+        queue_size: int = 100,
+        max_batch: int = 50,
+        timeout: float = 60
+    ):
+        self.generator = generator
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.timeout = timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending = 0  # Generations queued or running
+        self._flight = AsyncSingleFlight()
+        self._latencies = deque(maxlen=1000)
+        self._started_at = time.time()
+        self.counters = {
+            'requests': 0,
+            'rejected': 0,
+            'errors': 0,
+            'completed': 0,
+            'shortened': 0,
+        }
+
+    async def start(self) -> None:
+        """Start the worker pool (idempotent)"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._pending = 0
+        # Workers run in an empty context so they never inherit the request
+        # id of whichever request happened to start them
+        self._workers = [
+            contextvars.Context().run(asyncio.create_task, self._worker()) for _ in range(self.worker_count)
+        ]
+        logger.info(f"Ad service started with {self.worker_count} workers, queue size {self.queue_size}")
+
+    async def stop(self) -> None:
+        """Cancel workers and fail anything still waiting"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._flight.cancel_all()
+        self._queue = None
+
+    async def _worker(self) -> None:
+        while True:
+            key, future, context = await self._queue.get()
+            try:
+                product, language, variants = key
+                started = time.perf_counter()
+                # Run in the enqueuing request's context so model call logs carry its id
+                if variants > 1:
+                    result = await asyncio.to_thread(
+                        context.run, self.generator.generate_variants, product, language, variants
+                    )
+                else:
+                    result = await asyncio.to_thread(context.run, self.generator.generate_ad, product, language)
+                self._latencies.append(time.perf_counter() - started)
+                self.counters['completed'] += 1
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.counters['errors'] += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._pending -= 1
+                self._queue.task_done()
+
+    async def generate(self, product: str, language: str, variants: int = 1,
+                       top_k: Optional[int] = None) -> Union[Dict[str, str], List[Dict]]:
+        """
+        Generate one ad, joining an identical in-flight request when there is
+        one. With variants above 1, returns the top_k ranked variants instead.
+        """
+        await self.start()
+        self.counters['requests'] += 1
+        key = (product, language, variants)
+        result = await asyncio.wait_for(self._flight.do(key, self._enqueue, key), self.timeout)
+        return result[:top_k] if variants > 1 else result
+
+    async def _enqueue(self, key: Tuple[str, str, int]) -> Union[Dict[str, str], List[Dict]]:
+        """Queue one generation for the worker pool and wait for its result"""
+        # Idle workers only pick items up once the loop yields, so a burst is
+        # bounded by everything queued or running, not by the queue length
+        if self._pending >= self.worker_count + self.queue_size:
+            self.counters['rejected'] += 1
+            raise ServiceBusyError("Generation queue is full, retry later")
+        future = asyncio.get_running_loop().create_future()
+        self._pending += 1
+        self._queue.put_nowait((key, future, contextvars.copy_context()))
+        return await future
+
+    async def generate_batch(self, items: List[Dict[str, str]], fix_lengths: bool = False,
+                             variants: int = 1, top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Generate several ads concurrently; failures and over-limit fields are
+        reported per item. With fix_lengths, only the over-limit fields are
+        regenerated. With variants above 1, each entry also lists its top_k
+        ranked variants and "ad" is the best of them.
+        """
+        results = await asyncio.gather(
+            *(self.generate(item['product'], item['language'], variants, top_k) for item in items),
+            return_exceptions=True
+        )
+        response = []
+        for item, result in zip(items, results):
+            entry = {'product': item['product'], 'language': item['language']}
+            if isinstance(result, Exception):
+                entry['error'] = str(result) or type(result).__name__
+            elif variants > 1:
+                if result:
+                    entry['ad'] = result[0]['ad']
+                    entry['variants'] = result
+                else:
+                    entry['error'] = "No usable variants were returned"
+            else:
+                entry['ad'] = result
+            response.append(entry)
+
+        generated = [entry for entry in response if 'ad' in entry]
+        over_limit = await asyncio.to_thread(_length_violations, generated) if generated else {}
+        if fix_lengths and over_limit:
+            rows = list(over_limit)
+            await asyncio.gather(*(self._shorten(generated[row], over_limit[row]) for row in rows))
+            # Re-check only the ads that were rewritten
+            rechecked = await asyncio.to_thread(_length_violations, [generated[row] for row in rows])
+            over_limit = {rows[index]: violations for index, violations in rechecked.items()}
+
+        for index, violations in over_limit.items():
+            generated[index]['length_violations'] = violations
+        return response
+
+    async def _shorten(self, entry: Dict, violations: List[Dict]) -> None:
+        """Regenerate an entry's over-limit fields, keeping the original ad on failure"""
+        limits = {violation['field']: violation['limit'] for violation in violations}
+        try:
+            entry['ad'] = await asyncio.to_thread(
+                self.generator.shorten_fields, entry['product'], entry['language'], entry['ad'], limits
+            )
+            self.counters['shortened'] += 1
+            if entry.get('variants'):
+                # "ad" is the top variant; copy it, the list is shared with coalesced requests
+                entry['variants'] = [{**entry['variants'][0], 'ad': entry['ad']}, *entry['variants'][1:]]
+        except AdGenerationError as e:
+            logger.warning(f"Could not shorten ad for {entry['product']!r}: {str(e)}")
+
+    def metrics(self) -> Dict:
+        """Counters, queue state, latency percentiles and per-model stats"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'uptime_seconds': round(time.time() - self._started_at, 1),
+            'counters': {**self.counters, 'coalesced': self._flight.shared},
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'queue_size': self.queue_size,
+            'in_flight': self._flight.in_flight(),
+            'workers': self.worker_count,
+            'latency_seconds': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+            },
+            'models': self.generator.router.stats(),
+        }
+
+    # ASGI interface
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        method, path = scope['method'], scope['path'].rstrip('/') or '/'
+        headers = dict(scope.get('headers') or [])
+        request_id = headers.get(b'x-request-id', b'').decode('latin-1') or None
+
+        with request_context(request_id) as request_id:
+            with log_timing(logger, "HTTP request", method=method, path=path) as outcome:
+                await self._handle(method, path, receive, _ResponseTagger(send, request_id, outcome))
+
+    async def _handle(self, method, path, receive, send):
+        try:
+            if method == 'GET' and path == '/health':
+                await _send_json(send, 200, {'status': 'ok'})
+            elif method == 'GET' and path == '/metrics':
+                await _send_json(send, 200, self.metrics())
+            elif method == 'POST' and path == '/generate':
+                payload = await _read_json(receive)
+                item = _validate_item(payload)
+                variants, top_k = _validate_variants(payload)
+                result = await self.generate(item['product'], item['language'], variants, top_k)
+                if variants > 1:
+                    if not result:
+                        raise AdGenerationError("No usable variants were returned")
+                    await _send_json(send, 200, {**item, 'ad': result[0]['ad'], 'variants': result})
+                else:
+                    await _send_json(send, 200, {**item, 'ad': result})
+            elif method == 'POST' and path == '/generate/batch':
+                payload = await _read_json(receive)
+                items = payload.get('items') if isinstance(payload, dict) else None
+                if not isinstance(items, list) or not items:
+                    raise ValueError("'items' must be a non-empty list")
+                if len(items) > self.max_batch:
+                    raise ValueError(f"Batch too large (max {self.max_batch} items)")
+                items = [_validate_item(item) for item in items]
+                fix_lengths = payload.get('fix_lengths', False)
+                # Only a JSON boolean; "false" or 0 must not trigger paid regeneration
+                if not isinstance(fix_lengths, bool):
+                    raise ValueError("'fix_lengths' must be true or false")
+                variants, top_k = _validate_variants(payload)
+                results = await self.generate_batch(items, fix_lengths, variants, top_k)
+                await _send_json(send, 200, {'results': results})
+            else:
+                await _send_json(send, 404, {'error': 'Not found'})
+        except ValueError as e:
+            await _send_json(send, 400, {'error': str(e)})
+        except ServiceBusyError as e:
+            await _send_json(send, 503, {'error': str(e)}, [(b'retry-after', b'1')])
+        except asyncio.TimeoutError:
+            await _send_json(send, 504, {'error': 'Generation timed out'})
+        except AdGenerationError as e:
+            await _send_json(send, 502, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"Ad service request failed: {str(e)}")
+            await _send_json(send, 500, {'error': 'Internal server error'})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+class _ResponseTagger:
+    """Wraps ASGI send to add the X-Request-ID header and record the status code"""
+
+    def __init__(self, send, request_id, outcome):
+        self._send = send
+        self._request_id = request_id.encode('latin-1')
+        self._outcome = outcome
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.start':
+            message = {**message, 'headers': [*message.get('headers', []), (b'x-request-id', self._request_id)]}
+            self._outcome['http_status'] = message['status']
+        await self._send(message)
+
+
+def _length_violations(entries: List[Dict]) -> Dict[int, List[Dict]]:
+    """Over-limit fields of each generated ad, keyed by position in entries"""
+    frame = ads_frame(
+        [entry['ad'] for entry in entries],
+        [LANGUAGE_CODES.get(entry['language'], entry['language']) for entry in entries]
+    )
+    return describe_violations(validate_ads(frame))
+
+
+def _validate_item(payload) -> Dict[str, str]:
+    """Check a {product, language} request and normalize the language to its name"""
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    product = payload.get('product')
+    language = payload.get('language')
+    if not isinstance(product, str) or not product.strip():
+        raise ValueError("'product' is required")
+    if not isinstance(language, str) or not language.strip():
+        raise ValueError("'language' is required")
+    # Accept ISO codes as well as names; coalescing keys on the name
+    language = LANGUAGE_NAMES.get(language, language)
+    if language not in LANGUAGE_CODES:
+        raise ValueError(f"Unsupported language: {language}")
+    return {'product': product.strip(), 'language': language}
+
+
+def _validate_variants(payload: Dict) -> Tuple[int, Optional[int]]:
+    """Read the optional variants / top_k request fields"""
+    variants = payload.get('variants', 1)
+    top_k = payload.get('top_k')
+    # bool is an int subclass, but true/false is not a count
+    if isinstance(variants, bool) or not isinstance(variants, int) or not 1 <= variants <= MAX_AD_VARIANTS:
+        raise ValueError(f"'variants' must be an integer from 1 to {MAX_AD_VARIANTS}")
+    if top_k is not None and (isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1):
+        raise ValueError("'top_k' must be a positive integer")
+    return variants, top_k
+
+
+async def _read_json(receive):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    try:
+        return json.loads(body or b'{}')
+    except json.JSONDecodeError:
+        raise ValueError("Request body is not valid JSON")
+
+
+async def _send_json(send, status, payload, headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(body)).encode()),
+            *(headers or []),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _setting(key):
+    return int(os.getenv(key, SERVICE_DEFAULTS[key]))
+
+
+def create_app(api_key: Optional[str] = None, base_url: Optional[str] = None) -> AdService:
+    """
+    Build the service from the environment (.env is loaded if present).
+
+    OPENAI_BASE_URL points the shared client at another endpoint, such as
+    benchmarks/mock_openai.py for local testing.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    setup_logging()
+
+    workers = _setting('AD_SERVICE_WORKERS')
+    generator = AdGenerator(
+        api_key or os.getenv('OPENAI_API_KEY'),
+        base_url=base_url or os.getenv('OPENAI_BASE_URL'),
+        max_connections=workers
+    )
+    return AdService(
+        generator,
+        workers=workers,
+        queue_size=_setting('AD_SERVICE_QUEUE_SIZE'),
+        max_batch=_setting('AD_SERVICE_MAX_BATCH'),
+        timeout=_setting('AD_SERVICE_TIMEOUT')
+    )
+
+
+class _LazyApp:
+    """ASGI entry point for ``uvicorn ad_service:app``; builds the service on first use"""
+
+    def __init__(self):
+        self._service = None
+
+    async def __call__(self, scope, receive, send):
+        if self._service is None:
+            self._service = create_app()
+        await self._service(scope, receive, send)
+
+
+app = _LazyApp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless ad generation service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--base-url', default=None, help="OpenAI-compatible endpoint (e.g. a local mock)")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError("uvicorn package not installed. Run: pip install uvicorn")
+
+    uvicorn.run(create_app(base_url=args.base_url), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
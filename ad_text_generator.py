@@ -1,49 +1,76 @@
 # Standard library imports
-import streamlit as st
 import json
 from typing import Dict, Optional, List, Union
 from datetime import datetime
+import importlib.util
 import logging
-import logging.handlers
 import os
+import sys
 from enum import Enum
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 import locale
+import time
 
-# Third-party imports
-from dotenv import load_dotenv
-
-# Create logs directory if it doesn't exist
-try:
-    # Define log directory in user's home directory
-    LOG_DIR = Path.home() / '.adgenerator' / 'logs'
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    LOG_FILE = LOG_DIR / 'adbot.log'
-
-    # Configure logging with rotation
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),  # Console handler
-            logging.handlers.RotatingFileHandler(
-                filename=str(LOG_FILE),
-                maxBytes=1024*1024,  # 1MB
-                backupCount=5,
-                encoding='utf-8'
-            )
-        ]
-    )
+# Local imports
+from model_router import ModelRouter
+from single_flight import SingleFlight
+from structured_logging import (
+    setup_logging as setup_structured_logging, request_context, request_id_var, log_timing
+)
+
+
+class _MissingModule:
+    """Placeholder for an optional module that is not installed"""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        raise ImportError(f"{self._name} package not installed. Run: pip install {self._name}")
+
+
+def _lazy_import(name: str):
+    """
+    Import a module on first attribute access.
+
+    Under ``streamlit run`` the module is already loaded and is returned as is;
+    other importers (scripts, services, benchmarks) only pay for it when used.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        # Headless users (e.g. ad_service.py) can run without the UI package
+        return _MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# Third-party imports (loaded lazily, they dominate cold start)
+st = _lazy_import('streamlit')
+
+# Log records are queued and written by a background thread (JSON lines on disk)
+LOG_DIR = Path.home() / '.adgenerator' / 'logs'
+LOG_FILE = LOG_DIR / 'adbot.log'
 
-except Exception as e:
-    # Fallback to basic logging if file handling fails
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[logging.StreamHandler()]
-    )
-    logging.warning(f"Failed to setup file logging: {str(e)}. Falling back to console logging.")
+
+def setup_logging() -> None:
+    """
+    Configure queued console and rotating JSON file logging once per process.
+
+    Streamlit re-executes this script on every interaction; the shared
+    structured_logging module remembers that it is already set up, so later
+    calls return immediately instead of opening the log file again.
+    """
+    if setup_structured_logging(log_file=LOG_FILE):
+        # Initialize logging with default language
+        logging.info(f"Logging system initialized with language: {get_current_language().value}")
 
 # Define supported languages enum
 class SupportedLanguage(Enum):
@@ -67,33 +94,38 @@ class SupportedLanguage(Enum):
     TURKISH = 'tr'
     VIETNAMESE = 'vi'
     THAI = 'th'
+# Language maps are built once at import; lookups are plain dict hits
+LANGUAGE_CODES = MappingProxyType({
+    # Most common languages first
+    "English": "en",
+    "Spanish": "es",
+    "Mandarin Chinese": "zh",
+    "Hindi": "hi",
+    "Arabic": "ar",
+    "Portuguese": "pt",
+    "Bengali": "bn",
+    "Russian": "ru",
+    "Japanese": "ja",
+    "German": "de",
+    # Additional languages
+    "French": "fr",
+    "Italian": "it",
+    "Korean": "ko",
+    "Turkish": "tr",
+    "Vietnamese": "vi",
+    "Thai": "th"
+})
+LANGUAGE_NAMES = MappingProxyType({code: name for name, code in LANGUAGE_CODES.items()})
+SUPPORTED_LANGUAGES = tuple(LANGUAGE_CODES)
+
 def get_language_codes() -> Dict[str, str]:
     """
-    Get a dictionary of language names and their corresponding codes.
+    Get a read-only mapping of language names and their corresponding codes.
     
     Returns:
         Dict mapping language names to their ISO codes
     """
-    return {
-        # Most common languages first
-        "English": "en",
-        "Spanish": "es",
-        "Mandarin Chinese": "zh",
-        "Hindi": "hi",
-        "Arabic": "ar",
-        "Portuguese": "pt",
-        "Bengali": "bn",
-        "Russian": "ru",
-        "Japanese": "ja",
-        "German": "de",
-        # Additional languages
-        "French": "fr",
-        "Italian": "it",
-        "Korean": "ko",
-        "Turkish": "tr",
-        "Vietnamese": "vi",
-        "Thai": "th"
-    }
+    return LANGUAGE_CODES
 
 def get_language_name(code: str) -> str:
     """
@@ -105,8 +137,7 @@ def get_language_name(code: str) -> str:
     Returns:
         Full language name or 'Unknown' if code not found
     """
-    language_dict = {v: k for k, v in get_language_codes().items()}
-    return language_dict.get(code, "Unknown")
+    return LANGUAGE_NAMES.get(code, "Unknown")
 
 def get_language_code(name: str) -> str:
     """
@@ -118,7 +149,7 @@ def get_language_code(name: str) -> str:
     Returns:
         ISO language code or 'en' if name not found
     """
-    return get_language_codes().get(name, "en")
+    return LANGUAGE_CODES.get(name, "en")
 
 def get_supported_languages() -> List[str]:
     """
@@ -127,7 +158,7 @@ def get_supported_languages() -> List[str]:
     Returns:
         List of supported language names
     """
-    return list(get_language_codes().keys())
+    return list(SUPPORTED_LANGUAGES)
 
 
 # Set default language
@@ -161,40 +192,11 @@ def get_current_language() -> SupportedLanguage:
     """
     return CURRENT_LANGUAGE
 
-# Initialize logging with default language
-logging.info(f"Logging system initialized with language: {CURRENT_LANGUAGE.value}")
+setup_logging()
 
-class AdGenerator:
-    """Ad text generator with TONIC compliance"""
-    
-    def __init__(self, api_key: str):
-        """Initialize OpenAI client with API key validation"""
-        if not api_key or not isinstance(api_key, str):
-            raise ValueError("Valid OpenAI API key is required")
-            
-        try:
-            import openai
-            # Check for new OpenAI client version
-            if hasattr(openai, 'OpenAI'):
-                self.client = openai.OpenAI(api_key=api_key)
-                self.is_legacy = False
-            else:
-                # Support legacy version
-                openai.api_key = api_key
-                self.client = openai
-                self.is_legacy = True
-                logging.warning("Using legacy OpenAI client")
-        except ImportError:
-            raise ImportError("OpenAI package not installed. Run: pip install openai")
-
-    def generate_ad(self, product: str, language: str) -> Dict[str, str]:
-        """Generate TONIC-compliant ad text with error handling"""
-        try:
-            # Validate inputs
-            if not product or not language:
-                raise ValueError("Product and language are required")
-
-            system_message = """
+# Static prompt parts, kept byte-identical across requests so the provider can
+# cache them; only the product and language are appended per request
+AD_SYSTEM_MESSAGE = """
             You are an expert ad copywriter who creates TONIC-compliant advertisements.
             Keep all titles in English but generate content in the specified language.
             
@@ -211,8 +213,8 @@ class AdGenerator:
             Use subjunctive mood (might, could, may) instead of definitive statements.
             """
 
-            user_prompt = f"""
-            Create engaging ad text for {product} in {language}.
+AD_PROMPT_PREFIX = """
+            Create engaging ad text for the product below in the given language.
             
             Required components:
             Headline:
@@ -224,77 +226,353 @@ class AdGenerator:
             Domain Name:
             """
 
-            # Generate completion based on client version
-            if self.is_legacy:
-                response = self.client.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=500
-                )
-                generated_text = response.choices[0].message.content
-            else:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=500
-                )
-                generated_text = response.choices[0].message.content
+# Most variants requested in one completion call
+MAX_AD_VARIANTS = 5
 
-            # Parse response into components
-            components = {}
-            current_key: Optional[str] = None
+# Concurrent requests for a batch upload, and page sizes of the results table
+BATCH_WORKERS = 8
+RESULTS_PAGE_SIZES = (25, 100, 500)
+
+AD_SHORTEN_PREFIX = """
+            Rewrite each ad component below so it fits within its character limit.
+            Keep the language, meaning and TONIC compliance of the original.
+            Reply with one "Component: text" line per component and nothing else.
+            """
+
+class AdGenerationError(Exception):
+    """Raised when the model call or response parsing for an ad fails"""
+
+
+class AdGenerator:
+    """Ad text generator with TONIC compliance"""
+    
+    def __init__(
+        self,
+        api_key: str,
+        router: Optional[ModelRouter] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None
+    ):
+        """
+        Initialize OpenAI client with API key validation.
+
+        base_url points the client at another OpenAI-compatible endpoint (e.g. a
+        local mock); max_connections sizes the shared HTTP connection pool.
+        """
+        if not api_key or not isinstance(api_key, str):
+            raise ValueError("Valid OpenAI API key is required")
+
+        # Model routing is configured from the environment unless a router is given
+        self.router = router or ModelRouter.from_config(os.environ)
+        # Collapses concurrent identical (product, language) requests into one call
+        self.single_flight = SingleFlight()
             
-            for line in generated_text.split('\n'):
-                line = line.strip()
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    current_key = key.strip()
-                    components[current_key] = value.strip()
-                elif current_key and line:
-                    components[current_key] += ' ' + line
+        try:
+            import openai
+            # Check for new OpenAI client version
+            if hasattr(openai, 'OpenAI'):
+                client_kwargs = {'api_key': api_key, 'base_url': base_url}
+                if max_connections:
+                    import httpx
+                    client_kwargs['http_client'] = httpx.Client(limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections
+                    ))
+                self.client = openai.OpenAI(**client_kwargs)
+                self.is_legacy = False
+            else:
+                # Support legacy version
+                openai.api_key = api_key
+                if base_url:
+                    openai.api_base = base_url
+                self.client = openai
+                self.is_legacy = True
+                logging.warning("Using legacy OpenAI client")
+        except ImportError:
+            raise ImportError("OpenAI package not installed. Run: pip install openai")
+
+    def generate_ad(self, product: str, language: str) -> Dict[str, str]:
+        """Generate TONIC-compliant ad text, sharing identical in-flight requests"""
+        # Keep the caller's request id (e.g. from ad_service) or start a new one
+        with request_context(request_id_var.get()):
+            result = self.single_flight.do((product, language), self._generate_ad, product, language)
+        # Every waiter gets its own copy of the shared components
+        return dict(result)
+
+    def _generate_ad(self, product: str, language: str) -> Dict[str, str]:
+        """Generate TONIC-compliant ad text with error handling"""
+        try:
+            language_code, route, user_prompt = self._ad_request(product, language)
 
-            return components
+            # Generate completion based on client version
+            started = time.perf_counter()
+            with log_timing(logging.getLogger(__name__), "Ad model call", language=language_code,
+                            model=route.model, tier=route.tier):
+                generated_text, usage = self._complete(route, AD_SYSTEM_MESSAGE, user_prompt)
+            self.router.record(route.model, time.perf_counter() - started, usage)
+
+            # Parse response into components
+            return _parse_components(generated_text)
 
         except Exception as e:
             logging.error(f"Error generating ad text: {str(e)}")
             raise AdGenerationError(f"Failed to generate ad: {str(e)}")
 
-def display_ad_component(title: str, content: str, index: int):
-    """Display a single ad component with copy functionality"""
+    def generate_variants(self, product: str, language: str, n: int = 3,
+                          top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Generate n ad variants in a single request and return the top_k after
+        local de-duplication and ranking (see ad_variants.rank_variants)
+        """
+        with request_context(request_id_var.get()):
+            ranked = self.single_flight.do(('variants', product, language, n),
+                                           self._generate_variants, product, language, n)
+        # Every waiter gets its own copies of the shared variants
+        return [{**variant, 'ad': dict(variant['ad']), 'issues': list(variant['issues'])}
+                for variant in ranked[:top_k]]
+
+    def _generate_variants(self, product: str, language: str, n: int) -> List[Dict]:
+        """Request n choices in one completion call and rank them locally"""
+        from ad_variants import rank_variants
+
+        try:
+            language_code, route, user_prompt = self._ad_request(product, language)
+
+            # Choices are billed for completion tokens only; the prompt is sent once
+            started = time.perf_counter()
+            with log_timing(logging.getLogger(__name__), "Ad variants call", language=language_code,
+                            model=route.model, tier=route.tier, variants=n):
+                texts, usage = self._complete_choices(route, AD_SYSTEM_MESSAGE, user_prompt,
+                                                      n=n, temperature=0.9)
+            self.router.record(route.model, time.perf_counter() - started, usage)
+
+            return rank_variants([_parse_components(text) for text in texts], language_code)
+
+        except Exception as e:
+            logging.error(f"Error generating ad variants: {str(e)}")
+            raise AdGenerationError(f"Failed to generate ad variants: {str(e)}")
+
+    def _ad_request(self, product: str, language: str):
+        """Validate inputs and return (language code, route, user prompt) for an ad"""
+        if not product or not language:
+            raise ValueError("Product and language are required")
+
+        # Static prefix first so provider-side prompt caching can reuse it
+        user_prompt = AD_PROMPT_PREFIX + f"""
+            Product: {product}
+            Language: {language}
+            """
+
+        # Pick model and token budget for the target language
+        language_code = language if language in LANGUAGE_NAMES else get_language_code(language)
+        return language_code, self.router.route_ad(language_code), user_prompt
+
+    def shorten_fields(self, product: str, language: str, components: Dict[str, str],
+                       limits: Dict[str, int]) -> Dict[str, str]:
+        """Regenerate only the given components to fit their character limits"""
+        try:
+            fields = "\n".join(
+                f"{field} (max {limit} characters): {components[field]}"
+                for field, limit in limits.items() if field in components
+            )
+            user_prompt = AD_SHORTEN_PREFIX + f"""
+            Product: {product}
+            Language: {language}
+
+            {fields}
+            """
+
+            language_code = language if language in LANGUAGE_NAMES else get_language_code(language)
+            route = self.router.route_ad(language_code)
+            started = time.perf_counter()
+            with log_timing(logging.getLogger(__name__), "Ad shorten call", language=language_code,
+                            model=route.model, tier=route.tier, fields=len(limits)):
+                generated_text, usage = self._complete(route, AD_SYSTEM_MESSAGE, user_prompt)
+            self.router.record(route.model, time.perf_counter() - started, usage)
+
+            # Field names carry the "(max N characters)" hint back sometimes
+            rewritten = {key.split(' (max', 1)[0]: value for key, value in _parse_components(generated_text).items()}
+            return {**components, **{field: rewritten[field] for field in limits if rewritten.get(field)}}
+
+        except Exception as e:
+            logging.error(f"Error shortening ad text: {str(e)}")
+            raise AdGenerationError(f"Failed to shorten ad: {str(e)}")
+
+    def _complete(self, route, system_message: str, user_prompt: str):
+        """Send one chat completion request and return (generated text, usage)"""
+        texts, usage = self._complete_choices(route, system_message, user_prompt)
+        return texts[0], usage
+
+    def _complete_choices(self, route, system_message: str, user_prompt: str,
+                          n: int = 1, temperature: float = 0.7):
+        """Send one chat completion request for n choices and return (texts, usage)"""
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_prompt}
+        ]
+        if self.is_legacy:
+            response = self.client.ChatCompletion.create(
+                model=route.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=route.max_tokens,
+                n=n
+            )
+        else:
+            response = self.client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=route.max_tokens,
+                n=n
+            )
+        return [choice.message.content for choice in response.choices], getattr(response, 'usage', None)
+
+def _parse_components(generated_text: str) -> Dict[str, str]:
+    """Parse "Component: text" lines (with wrapped continuation lines) into a dict"""
+    components = {}
+    current_key: Optional[str] = None
+
+    for line in generated_text.split('\n'):
+        line = line.strip()
+        if ':' in line:
+            key, value = line.split(':', 1)
+            current_key = key.strip()
+            components[current_key] = value.strip()
+        elif current_key and line:
+            components[current_key] += ' ' + line
+
+    return components
+
+def load_api_key() -> Optional[str]:
+    """Load .env and return the OpenAI API key from the environment"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("OPENAI_API_KEY")
+
+def create_generator(api_key: str) -> "AdGenerator":
+    """Create an AdGenerator; wrapped in st.cache_resource by the app"""
+    return AdGenerator(api_key)
+
+def check_ad_lengths(ad: Dict[str, str], language: str) -> Dict[str, Dict]:
+    """Over-limit components of one ad as {component: {field, length, limit}}"""
+    from ad_validation import ads_frame, validate_ads, describe_violations
+
+    violations = describe_violations(validate_ads(ads_frame([ad], [get_language_code(language)])))
+    return {violation['field']: violation for violation in violations.get(0, [])}
+
+def display_ad_component(title: str, content: str, violation: Optional[Dict] = None):
+    """Display a single ad component; the code block has a built-in copy button"""
     st.markdown(f"#### {title}")
-    
-    # Content area with copy button
-    col1, col2 = st.columns([5,1])
-    
-    with col1:
-        # Use single line text input instead of text area
-        st.text_input(
-            "", 
-            value=content,
-            key=f"text_{index}",
-            disabled=True,
-            label_visibility="collapsed"
-        )
-    
-    with col2:
-        # Disable button if already copied
-        button_disabled = st.session_state.get(f'copied_{index}', False)
-        if st.button(
-            "📋",
-            key=f"copy_{index}",
-            disabled=button_disabled,
-            help="Copy to clipboard"
-        ):
-            st.session_state[f'copied_{index}'] = True
-            st.toast(f"Copied {title}!", icon="✅")
+    if violation:
+        st.caption(f":red[{violation['length']}/{violation['limit']} characters, over the limit]")
+    st.code(content, language=None)
+
+def display_batch_form(generator: "AdGenerator", results) -> None:
+    """Generate ads for an uploaded CSV of product/language rows into the session results"""
+    with st.expander("Batch Generation"):
+        upload = st.file_uploader("CSV with product and language columns:", type="csv", key="batch_upload")
+        if upload is None or not st.button("Generate Batch", use_container_width=True, key="batch_button"):
+            return
+
+        import pandas as pd
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        items = pd.read_csv(upload, dtype=str)
+        if not {'product', 'language'} <= set(items.columns):
+            st.error("The CSV needs 'product' and 'language' columns")
+            return
+        items = items.dropna(subset=['product', 'language'])
+        # Accept ISO codes as well as names
+        items['language'] = items['language'].str.strip().map(lambda value: LANGUAGE_NAMES.get(value, value))
+        unknown = ~items['language'].isin(SUPPORTED_LANGUAGES)
+        if unknown.any():
+            st.warning(f"Skipping {int(unknown.sum())} rows with unsupported languages")
+            items = items[~unknown]
+
+        progress = st.progress(0.0)
+        failed = 0
+        generated = []
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            futures = {
+                pool.submit(generator.generate_ad, product, language): (product, language)
+                for product, language in items[['product', 'language']].itertuples(index=False)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                product, language = futures[future]
+                try:
+                    ad = future.result()
+                except AdGenerationError:
+                    failed += 1
+                else:
+                    results.add(product, language, ad)
+                    generated.append((product, language, ad))
+                progress.progress(done / len(futures), text=f"{done}/{len(futures)} ads")
+
+        if failed:
+            st.warning(f"{failed} of {len(futures)} ads failed; see the log for details")
+        else:
+            st.success(f"Generated {len(futures)} ads")
+
+        # Check the whole batch against the field limits in one pass
+        if generated:
+            from ad_validation import ads_frame, validate_ads
+
+            violations = validate_ads(ads_frame(
+                [ad for _, _, ad in generated], [get_language_code(language) for _, language, _ in generated]
+            ))
+            if not violations.empty:
+                violations.insert(0, 'product', [generated[row][0] for row in violations['row']])
+                violations['language'] = [generated[row][1] for row in violations['row']]
+                st.warning(f"{violations['row'].nunique()} of {len(generated)} ads have fields over their character limit")
+                st.dataframe(violations.drop(columns='row'), hide_index=True, use_container_width=True)
+
+def display_session_results(results) -> None:
+    """One paginated table of every ad generated this session, with bulk export"""
+    from ad_results import EXPORT_FORMATS, export_bytes, page_count
+
+    if not len(results):
+        return
+
+    st.markdown("---")
+    st.markdown(f"#### Session Results ({len(results):,})")
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    product_filter = col1.text_input("Filter by product:", key="results_product")
+    language_filter = col2.selectbox("Language:", ("All",) + SUPPORTED_LANGUAGES, key="results_language")
+    page_size = col3.selectbox("Rows per page:", RESULTS_PAGE_SIZES, key="results_page_size")
+
+    selected = results.select(product_filter, None if language_filter == "All" else language_filter)
+    pages = page_count(len(selected), page_size)
+    # The page widget is driven only through its session_state key
+    if st.session_state.setdefault('results_page', 1) > pages:
+        st.session_state.results_page = pages
+    page = col4.number_input("Page:", min_value=1, max_value=pages, key="results_page")
+
+    # Only the visible page is sent to the browser
+    start = (page - 1) * page_size
+    st.dataframe(selected.iloc[start:start + page_size], hide_index=True, use_container_width=True)
+    if len(selected):
+        st.caption(f"Rows {start + 1:,}-{min(start + page_size, len(selected)):,} of {len(selected):,}")
+
+    # Export the whole session, built only on request
+    col1, col2 = st.columns([2, 1])
+    export_format = col1.selectbox("Export format:", list(EXPORT_FORMATS), key="export_format")
+    if col2.button("Prepare Export", use_container_width=True, key="export_button"):
+        try:
+            with st.spinner("Exporting..."):
+                data = export_bytes(results.frame, export_format)
+        except ImportError as e:
+            st.error(str(e))
+        else:
+            # Shown for this run only, so the export is not held across reruns
+            extension, mime = EXPORT_FORMATS[export_format]
+            st.download_button(
+                f"📥 Download {export_format} ({len(results):,} ads)",
+                data=data,
+                file_name=f"ads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                mime=mime,
+                use_container_width=True
+            )
 
 def main():
     """Main application function with error handling and state management"""
@@ -305,10 +583,15 @@ def main():
         st.session_state.generated_ads = None
     if 'generating' not in st.session_state:
         st.session_state.generating = False
-
-    # Load API key securely
-    load_dotenv()
-    api_key = os.getenv("OPENAI_API_KEY")
+    if 'generated_variants' not in st.session_state:
+        st.session_state.generated_variants = None
+    if 'ad_results' not in st.session_state:
+        from ad_results import AdResults
+        st.session_state.ad_results = AdResults()
+    results = st.session_state.ad_results
+
+    # Load API key securely (the .env file is read once per process)
+    api_key = st.cache_resource(load_api_key, show_spinner=False)()
     
     if not api_key:
         api_key = st.text_input(
@@ -322,7 +605,8 @@ def main():
         return
 
     try:
-        generator = AdGenerator(api_key)
+        # Reuse one generator (and its HTTP client) per API key across reruns
+        generator = st.cache_resource(create_generator, show_spinner=False)(api_key)
     except Exception as e:
         st.error(f"Failed to initialize generator: {str(e)}")
         return
@@ -336,9 +620,17 @@ def main():
         )
         language = st.selectbox(
             "Language:",
-            options=list(get_language_codes().keys()),
+            options=SUPPORTED_LANGUAGES,
             key="language_select"
         )
+        variant_count = st.number_input(
+            "Variants:",
+            min_value=1,
+            max_value=MAX_AD_VARIANTS,
+            value=1,
+            key="variant_count",
+            help="Alternatives requested in a single API call, best first"
+        )
 
     # Generate button with disable state
     generate_button = st.button(
@@ -356,8 +648,21 @@ def main():
         try:
             st.session_state.generating = True
             with st.spinner("Creating..."):
-                result = generator.generate_ad(product, language)
+                if variant_count > 1:
+                    ranked = generator.generate_variants(product, language, n=int(variant_count))
+                    if not ranked:
+                        raise AdGenerationError("No usable variants were returned")
+                    st.session_state.generated_variants = ranked
+                    st.session_state.variant_choice = 0
+                    result = ranked[0]['ad']
+                    for rank, variant in enumerate(ranked, 1):
+                        results.add(product, language, variant['ad'], rank, variant['score'])
+                else:
+                    st.session_state.generated_variants = None
+                    result = generator.generate_ad(product, language)
+                    results.add(product, language, result)
                 st.session_state.generated_ads = result
+                st.session_state.generated_for = (product, language)
         except Exception as e:
             st.error(f"Error: {str(e)}")
             logging.error(f"Generation failed: {str(e)}")
@@ -367,8 +672,41 @@ def main():
 
     # Display results
     if st.session_state.generated_ads:
-        for i, (title, content) in enumerate(st.session_state.generated_ads.items()):
-            display_ad_component(title, content, i)
+        ad_product, ad_language = st.session_state.generated_for
+
+        # Pick among ranked variants when several were generated
+        variants = st.session_state.get('generated_variants')
+        choice = 0
+        if variants and len(variants) > 1:
+            choice = st.radio(
+                "Variant:",
+                range(len(variants)),
+                format_func=lambda i: f"Option {i + 1} (score {variants[i]['score']:.2f})",
+                horizontal=True,
+                key="variant_choice"
+            )
+            st.session_state.generated_ads = variants[choice]['ad']
+            if variants[choice]['issues']:
+                st.caption(f"Possible TONIC issues: {', '.join(variants[choice]['issues'])}")
+
+        over_limit = check_ad_lengths(st.session_state.generated_ads, ad_language)
+        for title, content in st.session_state.generated_ads.items():
+            display_ad_component(title, content, over_limit.get(title))
+
+        # Regenerate only the components that are too long
+        if over_limit and st.button("✂️ Shorten Over-Limit Fields", use_container_width=True):
+            try:
+                with st.spinner("Shortening..."):
+                    st.session_state.generated_ads = generator.shorten_fields(
+                        ad_product, ad_language, st.session_state.generated_ads,
+                        {field: violation['limit'] for field, violation in over_limit.items()}
+                    )
+                if variants:
+                    variants[choice]['ad'] = st.session_state.generated_ads
+                results.add(ad_product, ad_language, st.session_state.generated_ads, choice + 1)
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
 
         # Download button for results
         st.markdown("---")
@@ -385,5 +723,8 @@ def main():
             use_container_width=True
         )
 
+    display_batch_form(generator, results)
+    display_session_results(results)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Character-limit validation for generated ads.
+
+Ad platforms cap each ad field (headline, primary text, ...) at a number of
+characters, where a "character" is what a reader sees: a Thai, Hindi or
+Bengali syllable with its vowel signs and conjuncts counts once, and
+full-width Chinese, Japanese and Korean characters count twice.
+
+Validation runs over whole batches at once: ads are stacked into one pandas
+column of (ad, field) texts and measured with a few vectorized regex passes,
+so only the fields that are over their limit need to be regenerated.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional
+
+# Default limit per ad component, in counted characters
+FIELD_LIMITS: Mapping[str, int] = MappingProxyType({
+    'Headline': 40,
+    'Primary Text': 125,
+    'Striking Question': 90,
+    'Bold Claim': 90,
+    'How-To Hook': 90,
+    'Emotional Trigger': 90,
+    'Domain Name': 30,
+})
+
+# Languages whose full-width characters count as two
+DOUBLE_WIDTH_LANGUAGES = frozenset({'zh', 'ja', 'ko'})
+
+# Virama (halant) signs and the consonants they join into one conjunct
+_VIRAMA = '\u094d\u09cd'
+_INDIC_CONSONANTS = '\u0915-\u0939\u0958-\u095f\u0995-\u09b9\u09dc-\u09df'
+
+
+def _char_class(codepoints: Iterable[int]) -> str:
+    """Regex character class matching the given code points, as ranges"""
+    parts = []
+    codepoints = sorted(set(codepoints))
+    start = prev = None
+    for cp in codepoints + [None]:
+        if prev is not None and cp == prev + 1:
+            prev = cp
+            continue
+        if start is not None:
+            first, last = re.escape(chr(start)), re.escape(chr(prev))
+            parts.append(first if start == prev else f"{first}-{last}")
+        start = prev = cp
+    return f"[{''.join(parts)}]"
+
+
+@lru_cache(maxsize=None)
+def _patterns():
+    """
+    (pattern of code points that do not start a new character, pattern of
+    full-width characters); built once from the Unicode database
+    """
+    marks = [0x200c, 0x200d, 0x0e33, 0x0eb3]  # ZWNJ, ZWJ, Thai/Lao sara am
+    marks += range(0x1f3fb, 0x1f400)  # Emoji skin tones
+    marks += range(0xe0020, 0xe0080)  # Emoji tag characters
+    wide = list(range(0x20000, 0x3fffe))  # CJK extension planes
+    for cp in range(0x300, 0x10000):
+        if 0xd800 <= cp < 0xe000:
+            continue
+        char = chr(cp)
+        if unicodedata.category(char) in ('Mn', 'Mc', 'Me'):
+            marks.append(cp)
+        elif unicodedata.east_asian_width(char) in ('W', 'F'):
+            wide.append(cp)
+
+    # A consonant joined by a virama belongs to the preceding character
+    joining = f"[{_VIRAMA}]\u200d?[{_INDIC_CONSONANTS}]"
+    return f"{joining}|{_char_class(marks)}", _char_class(wide)
+
+
+def character_lengths(texts, double_width=None):
+    """
+    Counted length of each text in a pandas Series: grapheme clusters, plus
+    one for every full-width character where ``double_width`` (a boolean
+    array) is set
+    """
+    import numpy as np
+
+    continuation, wide = _patterns()
+    texts = texts.fillna('').astype(str)
+    # Drop everything that continues a character, then count what is left
+    bases = texts.str.replace(continuation, '', regex=True)
+    lengths = bases.str.len().to_numpy(dtype=np.int64, copy=True)
+    if double_width is not None and double_width.any():
+        lengths[double_width] += bases[double_width].str.count(wide).to_numpy(dtype=np.int64)
+    return lengths
+
+
+def ads_frame(ads: Iterable[Dict[str, str]], languages: Iterable[str]):
+    """
+    One row per ad with a column per component and a ``language`` column
+    holding ISO language codes
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(list(ads))
+    frame['language'] = list(languages)
+    return frame
+
+
+def measure_ads(frame, limits: Optional[Mapping[str, int]] = None,
+                language_limits: Optional[Mapping[str, Mapping[str, int]]] = None):
+    """
+    Measure every limited field of every ad as a DataFrame with columns
+    row, language, field, length, limit.
+
+    ``row`` is the ad's index in ``frame``. ``limits`` replaces FIELD_LIMITS;
+    ``language_limits`` overrides them per language code.
+    """
+    import pandas as pd
+
+    limits = dict(FIELD_LIMITS if limits is None else limits)
+    fields = [field for field in limits if field in frame.columns]
+    columns = ['row', 'language', 'field', 'length', 'limit']
+    if not fields or frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    # (ad, field) -> text, skipping fields the model left out
+    texts = frame[fields].stack().dropna()
+    texts.index.names = ['row', 'field']
+    cells = texts.index.to_frame(index=False)
+    cells['language'] = frame['language'].reindex(cells['row']).to_numpy()
+
+    double_width = cells['language'].isin(DOUBLE_WIDTH_LANGUAGES).to_numpy()
+    cells['length'] = character_lengths(texts.reset_index(drop=True), double_width)
+
+    cells['limit'] = cells['field'].map(limits)
+    for language, overrides in (language_limits or {}).items():
+        for field, limit in overrides.items():
+            cells.loc[(cells['language'] == language) & (cells['field'] == field), 'limit'] = limit
+
+    return cells[columns]
+
+
+def validate_ads(frame, limits: Optional[Mapping[str, int]] = None,
+                 language_limits: Optional[Mapping[str, Mapping[str, int]]] = None):
+    """
+    The fields over their limit, in measure_ads format
+    """
+    cells = measure_ads(frame, limits, language_limits)
+    return cells[cells['length'] > cells['limit']].reset_index(drop=True)
+
+
+def describe_violations(violations) -> Dict[int, List[Dict]]:
+    """
+    Group validate_ads output into {row: [{field, length, limit}, ...]}
+    for responses and display
+    """
+    grouped: Dict[int, List[Dict]] = {}
+    for row, field, length, limit in violations[['row', 'field', 'length', 'limit']].itertuples(index=False):
+        grouped.setdefault(int(row), []).append({'field': field, 'length': int(length), 'limit': int(limit)})
+    return grouped
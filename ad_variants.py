@@ -0,0 +1,102 @@
+"""
+Local ranking of generated ad variants.
+
+AdGenerator.generate_variants asks for several completions in one request;
+this module scores them without further API calls. Each variant gets a
+TONIC compliance score (phrases the rules forbid, found with regexes) and a
+length fit score (how well its fields fit their character limits, see
+ad_validation.py). Variants are ranked by the combined score, and any
+variant too similar to a better one (character trigram Jaccard) is dropped.
+"""
+import re
+from typing import Dict, List, Optional, Set
+
+from ad_validation import FIELD_LIMITS, ads_frame, measure_ads
+
+# Phrases the TONIC rules forbid, checked in every field but the domain name
+TONIC_PATTERNS = {
+    'superlative': re.compile(r'\b(best|biggest|greatest|fastest|cheapest|ultimate|number one|top-rated)\b|#1', re.I),
+    'number': re.compile(r'\d|%'),
+    'free offer': re.compile(r'\b(free|discounts?|sale|coupons?|deals?)\b', re.I),
+    'guarantee': re.compile(r'\b(guarantee[ds]?|promise[ds]?|risk-free|proven)\b', re.I),
+    'urgency': re.compile(r"\b(limited time|act now|hurry|today only|last chance|don't miss)\b", re.I),
+}
+UNCHECKED_FIELDS = frozenset({'Domain Name'})
+
+# Weight of compliance vs. length fit in the combined score
+COMPLIANCE_WEIGHT = 0.6
+LENGTH_WEIGHT = 0.4
+
+
+def compliance_issues(ad: Dict[str, str]) -> List[str]:
+    """'Field: rule' for every TONIC rule a variant appears to break"""
+    issues = []
+    for field, text in ad.items():
+        if field in UNCHECKED_FIELDS:
+            continue
+        for rule, pattern in TONIC_PATTERNS.items():
+            if pattern.search(text):
+                issues.append(f"{field}: {rule}")
+    return issues
+
+
+def length_fit(ads: List[Dict[str, str]], language_code: str) -> List[float]:
+    """
+    Share of each ad's limited fields that are present and within their
+    limit; an over-limit field counts as limit/length
+    """
+    cells = measure_ads(ads_frame(ads, [language_code] * len(ads)))
+    if cells.empty:
+        return [0.0] * len(ads)
+    fit = (cells['limit'] / cells['length'].clip(lower=1)).clip(upper=1.0)
+    # Missing fields add nothing, so divide by every limited field
+    per_ad = fit.groupby(cells['row']).sum() / len(FIELD_LIMITS)
+    return [float(per_ad.get(row, 0.0)) for row in range(len(ads))]
+
+
+def _trigrams(ad: Dict[str, str]) -> Set[str]:
+    text = ' '.join(' '.join(ad.values()).lower().split())
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def similarity(first: Set[str], second: Set[str]) -> float:
+    """Jaccard similarity of two trigram sets"""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def rank_variants(ads: List[Dict[str, str]], language_code: str, top_k: Optional[int] = None,
+                  max_similarity: float = 0.8) -> List[Dict]:
+    """
+    Score, sort and de-duplicate variants; returns up to top_k entries of
+    {ad, score, compliance, length_fit, issues}, best first
+    """
+    ads = [ad for ad in ads if ad]
+    if not ads:
+        return []
+
+    ranked = []
+    for ad, fit in zip(ads, length_fit(ads, language_code)):
+        issues = compliance_issues(ad)
+        compliance = 1.0 / (1 + len(issues))
+        ranked.append({
+            'ad': ad,
+            'score': round(COMPLIANCE_WEIGHT * compliance + LENGTH_WEIGHT * fit, 3),
+            'compliance': round(compliance, 3),
+            'length_fit': round(fit, 3),
+            'issues': issues,
+        })
+    ranked.sort(key=lambda variant: variant['score'], reverse=True)
+
+    # Keep the better of any near-identical pair
+    kept, kept_trigrams = [], []
+    for variant in ranked:
+        trigrams = _trigrams(variant['ad'])
+        if any(similarity(trigrams, other) >= max_similarity for other in kept_trigrams):
+            continue
+        kept.append(variant)
+        kept_trigrams.append(trigrams)
+        if top_k and len(kept) >= top_k:
+            break
+    return kept
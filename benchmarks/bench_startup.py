@@ -0,0 +1,99 @@
+"""
+Startup profile for the Streamlit ad app.
+
+Measures the cold import time of ad_text_generator in fresh interpreters and
+the per-interaction cost of the language helpers that run on every rerun.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--profile]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def time_cold_import(runs):
+    """
+    Import ad_text_generator in a fresh interpreter per run and return wall times
+    """
+    code = (
+        "import time; t = time.perf_counter(); "
+        "import ad_text_generator; "
+        "print(time.perf_counter() - t)"
+    )
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def profile_imports(limit=15):
+    """
+    Print the slowest modules reported by ``python -X importtime``
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ad_text_generator"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), module.strip()))
+    print("\nSlowest imports (cumulative us):")
+    for cumulative, self_time, module in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative:>9} {self_time:>9}  {module}")
+
+
+def time_interaction(iterations=100_000):
+    """
+    Time the language helpers that run on every Streamlit rerun
+    """
+    sys.path.insert(0, str(ROOT))
+    import ad_text_generator as app
+
+    results = {}
+    for name, func in (
+        ("get_language_name", lambda: app.get_language_name("th")),
+        ("get_language_code", lambda: app.get_language_code("Thai")),
+        ("get_supported_languages", app.get_supported_languages),
+        ("setup_logging (repeat)", app.setup_logging),
+    ):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        results[name] = (time.perf_counter() - started) / iterations * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Cold import runs")
+    parser.add_argument("--profile", action="store_true", help="Show -X importtime breakdown")
+    args = parser.parse_args()
+
+    timings = time_cold_import(args.runs)
+    print(f"Cold import of ad_text_generator over {args.runs} runs:")
+    print(f"  median {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
+
+    if args.profile:
+        profile_imports()
+
+    print("\nPer-call cost of rerun helpers:")
+    for name, micros in time_interaction().items():
+        print(f"  {name:<26} {micros:.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Local mock of the OpenAI chat completions endpoint.
+
+Returns a canned ad after a configurable delay so ad_service.py (or the
+Streamlit app) can be exercised and load-tested without an API key:
+
+    python benchmarks/mock_openai.py --port 8001 --delay 0.5
+    OPENAI_API_KEY=test OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python ad_service.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_AD = """Headline: A fresh way to start your day
+Primary Text: This might be the companion your mornings could use.
+Striking Question: Could your routine feel lighter?
+Bold Claim: Many people may find it fits right in.
+How-To Hook: How to bring a little calm into busy mornings
+Emotional Trigger: Imagine how relaxed you might feel.
+Domain Name: morningideas.example"""
+
+# Extra choices for requests with n > 1; the last is a near-duplicate of CANNED_AD
+ALTERNATE_ADS = [
+    """Headline: Evenings could feel calmer
+Primary Text: Some people may find this helps them slow down after a long day.
+Striking Question: What might a quieter evening look like?
+Bold Claim: It could become part of a gentler routine.
+How-To Hook: How to make room for a slower evening
+Emotional Trigger: Picture the calm you might find.
+Domain Name: eveningideas.example""",
+    CANNED_AD.replace("fresh way", "new way"),
+]
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers every POST .../chat/completions with CANNED_AD (and alternates for n > 1)"""
+
+    delay = 0.0
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('chat/completions'):
+            self._reply(404, {'error': {'message': 'Not found'}})
+            return
+
+        with MockOpenAIHandler.lock:
+            MockOpenAIHandler.calls += 1
+        time.sleep(self.delay)
+
+        n = int(request.get('n', 1) or 1)
+        self._reply(200, {
+            'id': f'chatcmpl-mock-{MockOpenAIHandler.calls}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-3.5-turbo'),
+            'choices': [
+                {
+                    'index': i,
+                    'message': {'role': 'assistant', 'content': ([CANNED_AD] + ALTERNATE_ADS)[i % 3]},
+                    'finish_reason': 'stop',
+                }
+                for i in range(n)
+            ],
+            'usage': {
+                'prompt_tokens': 250,
+                'completion_tokens': 80 * n,
+                'total_tokens': 250 + 80 * n,
+                'prompt_tokens_details': {'cached_tokens': 128},
+            },
+        })
+
+    def do_GET(self):
+        self._reply(200, {'calls': MockOpenAIHandler.calls})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions endpoint")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.5, help="Seconds to wait before replying")
+    args = parser.parse_args()
+
+    MockOpenAIHandler.delay = args.delay
+    server = ThreadingHTTPServer((args.host, args.port), MockOpenAIHandler)
+    print(f"Mock OpenAI listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
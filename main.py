@@ -1,3 +1,5 @@
+import argparse
+import logging
 import os
 import requests
 from github import Github
@@ -11,9 +13,106 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.panel import Panel
 from rich.text import Text
+from rich.logging import RichHandler
 import time
 import openai
 import asyncio
+import contextvars
+import hashlib
+import queue
+import threading
+from model_router import ModelRouter, ROUTING_DEFAULTS, usage_counts
+from single_flight import SingleFlight
+from near_duplicates import DuplicateIndex, adapt_analysis, class_name
+from structured_logging import setup_logging, request_context, log_timing
+from report_store import ReportWriter, StructuredReportWriter
+
+logger = logging.getLogger(__name__)
+
+# JSON log of analyzer runs (records are written by a background thread)
+LOG_FILE = Path.home() / '.adgenerator' / 'logs' / 'analyzer.log'
+
+# System message shared by every analyzer request
+LARAVEL_SYSTEM_MESSAGE = "You are a Laravel expert performing code review. Focus on Laravel best practices, design patterns, and potential security issues."
+
+# Static instruction block; only the file type varies, so each type compiles
+# to one fixed prefix that providers can cache across requests
+LARAVEL_PROMPT_PREFIX = """Analyze the following Laravel {file_type} file.
+        
+        Provide:
+        1. Overview of the code's functionality
+        2. Laravel best practices assessment
+        3. Potential security vulnerabilities
+        4. Performance considerations
+        5. Suggested improvements
+        
+        Focus on Laravel-specific aspects such as:"""
+
+LARAVEL_TYPE_SPECIFIC_PROMPTS = {
+    'Controller': """
+            - RESTful practices
+            - Route model binding
+            - Form validation
+            - Authorization
+            - Response handling""",
+
+    'Model': """
+            - Eloquent relationships
+            - Attributes and casting
+            - Scopes and mutators
+            - Mass assignment protection
+            - Query optimization""",
+
+    'Middleware': """
+            - Request handling
+            - Auth checks
+            - Input sanitization
+            - Response modification""",
+
+    'Migration': """
+            - Schema design
+            - Indexes
+            - Foreign keys
+            - Rollback handling""",
+
+    'Route': """
+            - Organization
+            - Middleware usage
+            - Route naming
+            - Model binding
+            - API versioning"""
+}
+
+# Marks the end of a stage's output in the analysis pipeline
+_PIPELINE_DONE = object()
+
+# Token usage of the file being analyzed; chunk calls add to it
+_usage_var = contextvars.ContextVar('analysis_usage', default=None)
+
+
+class RepoFile:
+    """
+    A repository file whose content is fetched only when it is loaded
+    """
+    __slots__ = ('path', '_loader')
+
+    def __init__(self, path, loader):
+        self.path = path
+        self._loader = loader
+
+    def load(self):
+        """
+        Fetch and decode the file body
+        """
+        return self._loader(self.path)
+
+
+def _decode_content(content_file):
+    """
+    Decode a GitHub ContentFile body to text
+    """
+    return base64.b64decode(content_file.content).decode('utf-8')
+
 
 class ConfigurationManager:
     """
@@ -31,8 +130,16 @@ class ConfigurationManager:
             'MAX_TOKENS': 4000,
             'MAX_FILE_LINES': 300,
             'MAX_METHODS': 20,
-            'MAX_METHOD_LINES': 50
+            'MAX_METHOD_LINES': 50,
+            # Minimum estimated similarity (percent) for reusing another file's
+            # analysis; 0 disables near-duplicate detection
+            'DUPLICATE_SIMILARITY': 85,
+            # Global OpenAI request budget for multi-repository runs; 0 = unlimited
+            'REQUESTS_PER_MINUTE': 60
         }
+
+        # Model routing settings (see model_router.py)
+        self.routing_defaults = ROUTING_DEFAULTS
         
         self.config = {}
         self._load_configuration()
@@ -56,6 +163,11 @@ class ConfigurationManager:
         for key, default_value in self.defaults.items():
             self.config[key] = int(os.getenv(key, default_value))
 
+        # Routing settings keep the type of their default
+        for key, default_value in self.routing_defaults.items():
+            value = os.getenv(key, default_value)
+            self.config[key] = int(value) if isinstance(default_value, int) else value
+
     def get(self, key):
         """
         Get configuration value
@@ -74,6 +186,16 @@ class LaravelCodeAnalyzer:
         self.max_tokens = config_manager.get('MAX_TOKENS')
         self.encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
         self.console = Console()  # Add this line
+        self.router = ModelRouter.from_config(config_manager)
+        self._prompt_prefixes = {}  # Compiled static prompt prefix per file type
+        self.single_flight = SingleFlight()  # Shares identical in-flight chunk requests
+        # Optional cross-process helpers, set by multi-repository runs (org_runner.py)
+        self.response_cache = None
+        self.rate_limiter = None
+
+        # Near-duplicate files reuse the analysis of their cluster's representative
+        self.duplicate_similarity = config_manager.get('DUPLICATE_SIMILARITY')
+        self.duplicate_index = None
         
         # Define code complexity thresholds from configuration
         self.complexity_thresholds = {
@@ -146,13 +268,109 @@ class LaravelCodeAnalyzer:
 
     def analyze_repository(self, repo_url):
         """
-        Analyze Laravel repository with progress tracking
+        Analyze Laravel repository with progress tracking.
+
+        Returns every analysis in a dict; use analyze_repository_to_file to
+        stream a large repository straight into a report instead.
+        """
+        return {
+            file_path: record['analysis']
+            for file_path, record in self.analyze_repository_records(repo_url).items()
+        }
+
+    def analyze_repository_records(self, repo_url):
+        """
+        Like analyze_repository, but returns each file's full record (see
+        analyze_file) keyed by path, so save_analysis_to_file can also write
+        its metrics to the structured store
+        """
+        records = {}
+        self._run_pipeline(repo_url, lambda record: records.__setitem__(record['file_path'], record))
+        return records
+
+    def analyze_repository_to_file(self, repo_url, output_path="laravel_analysis_report.md", queue_size=8):
+        """
+        Analyze Laravel repository and stream the results into a Markdown report.
+
+        Files flow through bounded fetch -> analyze -> write stages, and each
+        body and analysis is dropped once written, so memory stays flat no
+        matter how many files the repository has. The same records are also
+        written as JSON lines next to the report (see report_store.py) for
+        querying with report_query.py.
+        """
+        writer = ReportWriter(output_path)
+        store = StructuredReportWriter(output_path, {
+            'repo_url': repo_url,
+            'thresholds': self.complexity_thresholds,
+        })
+
+        def sink(record):
+            writer.add(record['file_path'], record['analysis'])
+            store.add(record)
+
+        try:
+            self._run_pipeline(repo_url, sink, queue_size)
+        finally:
+            if self.duplicate_index is not None:
+                writer.clusters = self.duplicate_index.clusters()
+            summary = writer.close()
+            store.close(clusters=writer.clusters, models=self.router.stats(), summary=summary)
+        return summary
+
+    def _run_pipeline(self, repo_url, sink, queue_size=8):
+        """
+        Fetch, analyze and hand each file's record (see analyze_file) to ``sink(record)``.
+
+        Fetching runs ahead of analysis in a background thread and the sink
+        runs behind it in another, each connected by a bounded queue so a
+        slow stage applies backpressure instead of buffering the repository.
         """
         self.console.print(Panel("[bold blue]Laravel Code Analysis Started[/bold blue]", 
                                subtitle="analyzing repository structure"))
 
-        contents = self.get_repo_contents(repo_url)
-        analysis_results = {}
+        # Near-duplicate clusters are tracked per run
+        if self.duplicate_similarity:
+            self.duplicate_index = DuplicateIndex(threshold=self.duplicate_similarity / 100)
+
+        fetched = queue.Queue(maxsize=queue_size)
+        analyzed = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        errors = []
+
+        def fetch_stage():
+            try:
+                for repo_file in self.iter_repo_files(repo_url):
+                    if stop.is_set():
+                        break
+                    try:
+                        content = repo_file.load()
+                    except Exception as e:
+                        logger.warning(f"Could not load {repo_file.path}: {str(e)}")
+                        continue
+                    fetched.put((repo_file.path, content))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                fetched.put(_PIPELINE_DONE)
+
+        def write_stage():
+            while True:
+                item = analyzed.get()
+                if item is _PIPELINE_DONE:
+                    break
+                try:
+                    sink(item)
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+
+        fetcher = threading.Thread(target=fetch_stage, name="analysis-fetch", daemon=True)
+        writer = threading.Thread(target=write_stage, name="analysis-write", daemon=True)
+        fetcher.start()
+        writer.start()
+
+        total_files = 0
+        files_with_issues = 0
         
         with Progress(
             SpinnerColumn(),
@@ -163,30 +381,51 @@ class LaravelCodeAnalyzer:
         ) as progress:
             analyze_task = progress.add_task(
                 "[cyan]Analyzing files...", 
-                total=len(contents)
+                total=None
             )
 
-            for file_info in contents:
-                file_path = file_info['path']
-                self.console.print(f"[yellow]→ Analyzing:[/yellow] {file_path}")
-                
-                analysis = self.analyze_laravel_code(file_info['content'], file_path)
-                analysis_results[file_path] = analysis
-                
-                progress.advance(analyze_task)
-                
-                # Show quick summary of findings
-                if "⚠️ Complexity Warnings" in analysis:
-                    self.console.print(f"[red]⚠️  Issues found in {file_path}[/red]")
-                else:
-                    self.console.print(f"[green]✓ {file_path} analyzed[/green]")
-                
-                time.sleep(0.1)  # Small delay for better visual feedback
+            try:
+                while True:
+                    item = fetched.get()
+                    if item is _PIPELINE_DONE:
+                        break
+                    if stop.is_set():
+                        continue  # Drain so the fetcher can finish
+
+                    file_path, content = item
+                    progress.update(analyze_task, description=f"[cyan]Analyzing[/cyan] {file_path}")
+                    
+                    # Each file is one request in the logs; console lines go
+                    # through the logging queue instead of blocking here
+                    with request_context(), log_timing(logger, f"Analyzed {file_path}", file_path=file_path) as outcome:
+                        record = self.analyze_file(content, file_path)
+                        del item, content  # Release the file body before the next fetch
+                        outcome['issues'] = record['has_warnings']
+                    
+                    total_files += 1
+                    progress.update(analyze_task, advance=1)
+                    
+                    # Show quick summary of findings
+                    if outcome['issues']:
+                        files_with_issues += 1
+                        logger.warning(f"⚠️  Issues found in {file_path}")
+
+                    analyzed.put(record)
+            finally:
+                stop.set()
+                analyzed.put(_PIPELINE_DONE)
+                # Drain anything the fetcher still has queued so it can exit
+                while fetcher.is_alive():
+                    try:
+                        fetched.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                writer.join()
+
+        if errors:
+            raise errors[0]
 
         # Print summary
-        total_files = len(analysis_results)
-        files_with_issues = sum(1 for a in analysis_results.values() if "⚠️ Complexity Warnings" in a)
-        
         self.console.print("\n[bold]Analysis Summary:[/bold]")
         self.console.print(Panel(
             f"""
@@ -198,11 +437,27 @@ class LaravelCodeAnalyzer:
             border_style="blue"
         ))
 
-        return analysis_results
-        
+        model_stats = self.router.format_stats()
+        if model_stats:
+            self.console.print(Panel(model_stats, title="Model Usage", border_style="blue"))
+
     def get_repo_contents(self, repo_url):
         """
-        Get relevant Laravel files from a GitHub repository
+        Get relevant Laravel files from a GitHub repository.
+
+        Loads every file body up front; prefer iter_repo_files for large repositories.
+        """
+        return [
+            {'path': repo_file.path, 'content': repo_file.load()}
+            for repo_file in self.iter_repo_files(repo_url)
+        ]
+
+    def iter_repo_files(self, repo_url):
+        """
+        Yield relevant Laravel files from a GitHub repository as RepoFile records.
+
+        Only paths are collected while walking the tree; each body is fetched
+        when its record is loaded, so nothing accumulates in memory.
         """
         try:
             # Extract owner and repo name from URL
@@ -210,37 +465,44 @@ class LaravelCodeAnalyzer:
             
             # Get repository
             repo = self.g.get_repo(f"{owner}/{repo_name}")
-            
-            # Get Laravel-specific contents
-            contents = []
-            for path in self.analysis_paths.keys():
-                try:
-                    self._get_contents_recursive(repo, path, contents)
-                except Exception as e:
-                    print(f"Warning: Could not access {path}: {str(e)}")
-            
-            return contents
         except Exception as e:
-            print(f"Error fetching repository contents: {str(e)}")
-            return []
+            logger.error(f"Error fetching repository contents: {str(e)}")
+            return
 
-    def _get_contents_recursive(self, repo, path, contents):
+        # Analysis paths overlap ('app' contains 'app/Models'), so track
+        # visited paths to fetch and analyze each file only once
+        seen = set()
+        for path in self.analysis_paths.keys():
+            try:
+                yield from self._iter_contents_recursive(repo, path, seen)
+            except Exception as e:
+                logger.warning(f"Could not access {path}: {str(e)}")
+
+    def _iter_contents_recursive(self, repo, path, seen):
         """
-        Recursively get Laravel files from repository
+        Recursively yield Laravel files from repository, skipping paths in ``seen``
         """
+        if path in seen:
+            return
+        seen.add(path)
+
         try:
             items = repo.get_contents(path)
-            
-            for item in items:
-                if item.type == "dir":
-                    self._get_contents_recursive(repo, item.path, contents)
-                elif self.should_analyze_file(item.path):
-                    contents.append({
-                        'path': item.path,
-                        'content': base64.b64decode(item.content).decode('utf-8')
-                    })
         except Exception as e:
-            print(f"Warning: Error accessing {path}: {str(e)}")
+            logger.warning(f"Error accessing {path}: {str(e)}")
+            return
+
+        if not isinstance(items, list):
+            items = [items]
+
+        for item in items:
+            if item.path in seen:
+                continue
+            if item.type == "dir":
+                yield from self._iter_contents_recursive(repo, item.path, seen)
+            elif self.should_analyze_file(item.path):
+                seen.add(item.path)
+                yield RepoFile(item.path, lambda file_path, repo=repo: _decode_content(repo.get_contents(file_path)))
 
     def should_analyze_file(self, file_path):
         """
@@ -295,58 +557,166 @@ class LaravelCodeAnalyzer:
         
         return complexity_report
 
-    async def analyze_laravel_code_chunk(self, code_chunk, file_path, chunk_index, total_chunks):
+    async def analyze_laravel_code_chunk(self, code_chunk, file_path, chunk_index, total_chunks, route=None):
         """
         Analyze a single chunk of Laravel code
         """
         try:
             file_type = self._get_laravel_file_type(file_path)
+            if route is None:
+                route = self.router.route_analysis(file_type)
             
             chunk_context = f"This is chunk {chunk_index + 1} of {total_chunks} from the file."
             prompt = self._create_laravel_prompt(file_type, code_chunk, file_path, chunk_context)
 
-            response = await asyncio.to_thread(openai.ChatCompletion.create,
-                model="gpt-3.5-turbo",
+            # Identical prompts running at the same time share one API call
+            key = (route.model, route.max_tokens, hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+            return await asyncio.to_thread(self.single_flight.do, key, self._complete_chunk, prompt, route)
+        except Exception as e:
+            return f"Error analyzing code chunk: {str(e)}"
+
+    def _complete_chunk(self, prompt, route):
+        """
+        Send one chunk prompt to the routed model and return the analysis text
+        """
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(route.model, route.max_tokens, LARAVEL_SYSTEM_MESSAGE, prompt)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                usage = _usage_var.get()
+                if usage is not None:
+                    usage['cached_responses'] += 1
+                return cached
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        started = time.perf_counter()
+        with log_timing(logger, "Chunk model call", level=logging.DEBUG, model=route.model, tier=route.tier):
+            response = openai.ChatCompletion.create(
+                model=route.model,
                 messages=[
-                    {"role": "system", "content": "You are a Laravel expert performing code review. Focus on Laravel best practices, design patterns, and potential security issues."},
+                    {"role": "system", "content": LARAVEL_SYSTEM_MESSAGE},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=1000
+                max_tokens=route.max_tokens
             )
-            
-            return response.choices[0].message['content']
-        except Exception as e:
-            return f"Error analyzing code chunk: {str(e)}"
+        self.router.record(route.model, time.perf_counter() - started, response.get('usage'))
+        usage = _usage_var.get()
+        if usage is not None:
+            prompt_tokens, completion_tokens, cached_tokens = usage_counts(response.get('usage'))
+            usage['calls'] += 1
+            usage['prompt_tokens'] += prompt_tokens
+            usage['completion_tokens'] += completion_tokens
+            usage['cached_tokens'] += cached_tokens
+
+        content = response.choices[0].message['content']
+        if cache_key is not None:
+            self.response_cache.put(cache_key, content)
+        return content
 
     def analyze_laravel_code(self, code_content, file_path):
         """
         Analyze Laravel code with chunking support
         """
+        return self.analyze_file(code_content, file_path)['analysis']
+
+    def analyze_file(self, code_content, file_path):
+        """
+        Analyze one file and return its flat report record.
+
+        The record carries the complexity metrics, routing, token usage and
+        timing of the file alongside the per-chunk findings and the combined
+        Markdown analysis.
+        """
+        started = time.perf_counter()
+        usage = {'calls': 0, 'cached_responses': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0}
+        token = _usage_var.set(usage)
+        record = {
+            'file_path': file_path,
+            'file_type': self._get_laravel_file_type(file_path),
+            'content_sha256': hashlib.sha256(code_content.encode('utf-8')).hexdigest(),
+            'has_warnings': False,
+            'tier': None,
+            'model': None,
+            'duplicate_of': None,
+            'similarity': None,
+            'chunks': 0,
+            'chunk_errors': 0,
+            'error': None,
+        }
         try:
             # First analyze complexity
             complexity_report = self.analyze_code_complexity(code_content)
-            
-            # Split code into chunks if necessary
-            chunks = self.split_code_into_chunks(code_content, self.max_tokens // 2)
-            
-            # Analyze each chunk
-            chunk_analyses = []
-            for i, chunk in enumerate(chunks):
-                # Run synchronously since we're in a sync method
-                analysis = asyncio.run(self.analyze_laravel_code_chunk(chunk, file_path, i, len(chunks)))
-                chunk_analyses.append(analysis)
-            
+            file_type = record['file_type']
+            record.update({
+                'total_lines': complexity_report['total_lines'],
+                'method_count': complexity_report['method_count'],
+                'long_methods': complexity_report['long_methods'],
+                **complexity_report['exceeds_thresholds'],
+                'has_warnings': any(complexity_report['exceeds_thresholds'].values()),
+            })
+
+            # Reuse the analysis of a near-identical file when there is one
+            fingerprint = None
+            match = None
+            if self.duplicate_index is not None:
+                fingerprint = self.duplicate_index.fingerprint(code_content)
+                match = self.duplicate_index.match(file_type, fingerprint)
+
+            if match is not None:
+                self.duplicate_index.add_member(match.representative, file_path)
+                source_class, source_analyses = match.payload
+                target_class = class_name(code_content)
+                chunk_analyses = [
+                    adapt_analysis(analysis, match.representative, source_class, file_path, target_class)
+                    for analysis in source_analyses
+                ]
+                record.update({'duplicate_of': match.representative, 'similarity': round(match.similarity, 3)})
+            else:
+                # Pick model and token budget from file type and complexity
+                route = self.router.route_analysis(file_type, complexity_report)
+                record.update({'tier': route.tier, 'model': route.model})
+
+                # Split code into chunks if necessary
+                chunks = self.split_code_into_chunks(code_content, self.max_tokens // 2)
+
+                # Analyze each chunk
+                chunk_analyses = []
+                for i, chunk in enumerate(chunks):
+                    # Run synchronously since we're in a sync method
+                    analysis = asyncio.run(self.analyze_laravel_code_chunk(chunk, file_path, i, len(chunks), route))
+                    chunk_analyses.append(analysis)
+
+                # Only clean analyses become cluster representatives
+                if fingerprint is not None and not any(a.startswith("Error analyzing code chunk") for a in chunk_analyses):
+                    self.duplicate_index.add(file_type, file_path, fingerprint, (class_name(code_content), chunk_analyses))
+
             # Combine analyses
-            combined_analysis = self._combine_analyses(chunk_analyses, complexity_report, file_path)
-            return combined_analysis
+            record['chunks'] = len(chunk_analyses)
+            record['chunk_errors'] = sum(a.startswith("Error analyzing code chunk") for a in chunk_analyses)
+            record['findings'] = chunk_analyses
+            record['analysis'] = self._combine_analyses(chunk_analyses, complexity_report, file_path, match)
         except Exception as e:
-            return f"Error in analysis: {str(e)}"
+            record['error'] = str(e)
+            record['analysis'] = f"Error in analysis: {str(e)}"
+        finally:
+            _usage_var.reset(token)
+
+        record.update(usage)
+        record['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return record
 
-    def _combine_analyses(self, chunk_analyses, complexity_report, file_path):
+    def _combine_analyses(self, chunk_analyses, complexity_report, file_path, duplicate_of=None):
         """
         Combine multiple chunk analyses and complexity report into a single coherent analysis
         """
         combined = "# File Analysis Summary\n\n"
+
+        if duplicate_of is not None:
+            combined += (f"> Near-duplicate of {duplicate_of.representative} "
+                         f"({duplicate_of.similarity:.0%} similar); analysis reused from it.\n\n")
         
         # Add complexity warnings
         if any(complexity_report['exceeds_thresholds'].values()):
@@ -377,170 +747,85 @@ class LaravelCodeAnalyzer:
 
     def _create_laravel_prompt(self, file_type, code_content, file_path, chunk_context=""):
         """
-        Create a Laravel-specific analysis prompt based on file type
+        Create a Laravel-specific analysis prompt based on file type.
+
+        The prompt starts with the compiled static prefix for the file type so
+        provider-side prompt caching can reuse it; the file path, chunk context
+        and code follow it.
         """
-        base_prompt = f"""Analyze the following Laravel {file_type} file ({file_path}).
-        {chunk_context}
-        
-        Provide:
-        1. Overview of the code's functionality
-        2. Laravel best practices assessment
-        3. Potential security vulnerabilities
-        4. Performance considerations
-        5. Suggested improvements
-        
-        Focus on Laravel-specific aspects such as:"""
-        
-        type_specific_prompts = {
-            'Controller': """
-            - RESTful practices
-            - Route model binding
-            - Form validation
-            - Authorization
-            - Response handling""",
-            
-            'Model': """
-            - Eloquent relationships
-            - Attributes and casting
-            - Scopes and mutators
-            - Mass assignment protection
-            - Query optimization""",
-            
-            'Middleware': """
-            - Request handling
-            - Auth checks
-            - Input sanitization
-            - Response modification""",
-            
-            'Migration': """
-            - Schema design
-            - Indexes
-            - Foreign keys
-            - Rollback handling""",
-            
-            'Route': """
-            - Organization
-            - Middleware usage
-            - Route naming
-            - Model binding
-            - API versioning"""
-        }
-        
-        full_prompt = base_prompt + type_specific_prompts.get(file_type, "") + f"\n\nCode:\n{code_content}"
-        return full_prompt
+        prefix = self._get_prompt_prefix(file_type)
+        return f"{prefix}\n\nFile: {file_path}\n{chunk_context}\n\nCode:\n{code_content}"
 
-    def _get_laravel_file_type(self, file_path):
+    def _get_prompt_prefix(self, file_type):
         """
-        Determine the type of Laravel file based on its path
-        """
-        if 'Controllers' in file_path:
-            return 'Controller'
-        elif 'Models' in file_path:
-            return 'Model'
-        elif 'Middleware' in file_path:
-            return 'Middleware'
-        elif 'Providers' in file_path:
-            return 'Service Provider'
-        elif 'migrations' in file_path:
-            return 'Migration'
-        elif 'routes' in file_path:
-            return 'Route'
-        elif 'config' in file_path:
-            return 'Config'
-        return 'PHP'
+        Return the byte-identical static prompt prefix for a file type, compiling it once
+        """
+        prefix = self._prompt_prefixes.get(file_type)
+        if prefix is None:
+            prefix = (LARAVEL_PROMPT_PREFIX.format(file_type=file_type)
+                      + LARAVEL_TYPE_SPECIFIC_PROMPTS.get(file_type, ""))
+            self._prompt_prefixes[file_type] = prefix
+        return prefix
 
-    def _create_laravel_prompt(self, file_type, code_content, file_path, chunk_context=""):
+    def _get_laravel_file_type(self, file_path):
         """
-        Create a Laravel-specific analysis prompt based on file type
+        Laravel file type of a path (see laravel_file_type)
         """
-        base_prompt = f"""Analyze the following Laravel {file_type} file ({file_path}).
-        {chunk_context}
-        
-        Provide:
-        1. Overview of the code's functionality
-        2. Laravel best practices assessment
-        3. Potential security vulnerabilities
-        4. Performance considerations
-        5. Suggested improvements
-        
-        Focus on Laravel-specific aspects such as:"""
-        
-        type_specific_prompts = {
-            'Controller': """
-            - RESTful practices
-            - Route model binding
-            - Form validation
-            - Authorization
-            - Response handling""",
-            
-            'Model': """
-            - Eloquent relationships
-            - Attributes and casting
-            - Scopes and mutators
-            - Mass assignment protection
-            - Query optimization""",
-            
-            'Middleware': """
-            - Request handling
-            - Auth checks
-            - Input sanitization
-            - Response modification""",
-            
-            'Migration': """
-            - Schema design
-            - Indexes
-            - Foreign keys
-            - Rollback handling""",
-            
-            'Route': """
-            - Organization
-            - Middleware usage
-            - Route naming
-            - Model binding
-            - API versioning"""
-        }
-        
-        full_prompt = base_prompt + type_specific_prompts.get(file_type, "") + f"\n\nCode:\n{code_content}"
-        return full_prompt
+        return laravel_file_type(file_path)
+
 
-def save_analysis_to_file(analysis_results, output_path="laravel_analysis_report.md"):
+def laravel_file_type(file_path):
     """
-    Save analysis results to a markdown file with enhanced formatting
+    Determine the type of Laravel file based on its path
     """
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("# Laravel Code Analysis Report\n\n")
-        
-        # Add summary section
-        f.write("## Summary Statistics\n\n")
-        total_files = len(analysis_results)
-        complex_files = sum(1 for analysis in analysis_results.values() 
-                          if "⚠️ Complexity Warnings" in analysis)
-        
-        f.write(f"- Total Files Analyzed: {total_files}\n")
-        f.write(f"- Files with Complexity Warnings: {complex_files}\n\n")
-        
-        if complex_files > 0:
-            f.write("### Files Needing Attention\n\n")
-            for file_path, analysis in analysis_results.items():
-                if "⚠️ Complexity Warnings" in analysis:
-                    f.write(f"- {file_path}\n")
-            f.write("\n")
-        
-        # Group files by type
-        grouped_results = {}
-        for file_path, analysis in analysis_results.items():
-            file_type = file_path.split('/')[1] if '/' in file_path else 'Other'
-            if file_type not in grouped_results:
-                grouped_results[file_type] = {}
-            grouped_results[file_type][file_path] = analysis
-        
-        # Write detailed analysis
-        for file_type, files in grouped_results.items():
-            f.write(f"## {file_type}\n\n")
-            for file_path, analysis in files.items():
-                f.write(f"### {file_path}\n\n")
-                f.write(analysis)
-                f.write("\n\n---\n\n")
+    if 'Controllers' in file_path:
+        return 'Controller'
+    elif 'Models' in file_path:
+        return 'Model'
+    elif 'Middleware' in file_path:
+        return 'Middleware'
+    elif 'Providers' in file_path:
+        return 'Service Provider'
+    elif 'migrations' in file_path:
+        return 'Migration'
+    elif 'routes' in file_path:
+        return 'Route'
+    elif 'config' in file_path:
+        return 'Config'
+    return 'PHP'
+
+
+def save_analysis_to_file(analysis_results, output_path="laravel_analysis_report.md", clusters=None, run_info=None):
+    """
+    Save analysis results to a markdown file with enhanced formatting, and
+    the same records to the structured store next to it (see report_store.py).
+
+    analysis_results is a dict of file path -> record (see analyze_file) or
+    analysis text, or any iterable of such pairs, which is consumed one entry
+    at a time. Plain analysis text is stored with only its file type and
+    whether it carries complexity warnings.
+    """
+    if hasattr(analysis_results, 'items'):
+        analysis_results = analysis_results.items()
+
+    writer = ReportWriter(output_path)
+    writer.clusters = clusters or {}
+    store = StructuredReportWriter(output_path, run_info)
+    try:
+        for file_path, record in analysis_results:
+            if not isinstance(record, dict):
+                record = {
+                    'file_path': file_path,
+                    'file_type': laravel_file_type(file_path),
+                    'has_warnings': "⚠️ Complexity Warnings" in record,
+                    'analysis': record,
+                }
+            writer.add(file_path, record['analysis'])
+            store.add(record)
+    finally:
+        summary = writer.close()
+        store.close(clusters=writer.clusters, summary=summary)
+    return summary
 
 def create_default_env():
     """
@@ -557,6 +842,16 @@ MAX_TOKENS=4000
 MAX_FILE_LINES=300
 MAX_METHODS=20
 MAX_METHOD_LINES=50
+DUPLICATE_SIMILARITY=85
+REQUESTS_PER_MINUTE=60
+
+# Model Routing
+MODEL_FAST=gpt-3.5-turbo
+MODEL_STANDARD=gpt-3.5-turbo
+MODEL_STRONG=gpt-3.5-turbo
+MAX_TOKENS_FAST=600
+MAX_TOKENS_STANDARD=1000
+MAX_TOKENS_STRONG=1500
 """)
         print("Created default .env file. Please update it with your tokens.")
         return False
@@ -564,36 +859,29 @@ MAX_METHOD_LINES=50
 
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a Laravel GitHub repository")
+    parser.add_argument('repo_url', nargs='?', help="Repository URL (prompted for when omitted)")
+    parser.add_argument('--output', default="laravel_analysis_report.md", help="Markdown report path")
+    args = parser.parse_args(argv)
+
     # Create default .env if it doesn't exist
     if not create_default_env():
         return
 
     try:
-
-        st.title("Ad Text Generator")
-    
-        # Language selector
-        selected_language = st.selectbox(
-            "Select Language",
-            options=get_supported_languages(),
-            index=0  # Default to first language (English)
-        )
-        
-        # Set the application language
-        current_lang_code = get_language_code(selected_language)
-        set_language(current_lang_code)
-        
-        # Log language selection
-        logging.info(f"Selected language: {selected_language} ({current_lang_code})")
         # Initialize configuration
         config_manager = ConfigurationManager()
         
         # Initialize analyzer
         analyzer = LaravelCodeAnalyzer(config_manager)
+        setup_logging(
+            log_file=LOG_FILE,
+            console_handler=RichHandler(console=analyzer.console, show_path=False)
+        )
         
         # Get repository URL from user
-        repo_url = input("Enter Laravel GitHub repository URL: ")
+        repo_url = args.repo_url or input("Enter Laravel GitHub repository URL: ")
         
         # Analyze repository
         print("Starting Laravel repository analysis...")
@@ -602,11 +890,9 @@ def main():
         print(f"- Max methods per class: {config_manager.get('MAX_METHODS')}")
         print(f"- Max lines per method: {config_manager.get('MAX_METHOD_LINES')}")
         
-        analysis_results = analyzer.analyze_repository(repo_url)
-        
-        # Save results
-        output_file = "laravel_analysis_report.md"
-        save_analysis_to_file(analysis_results, output_file)
+        # Analyze and stream results into the report
+        output_file = args.output
+        analyzer.analyze_repository_to_file(repo_url, output_file)
         print(f"Analysis completed! Results saved to {output_file}")
         
     except ValueError as e:
@@ -615,4 +901,4 @@ def main():
         print(f"An error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
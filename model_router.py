@@ -0,0 +1,198 @@
+"""
+Model routing shared by the Laravel analyzer and the ad generator.
+
+Requests are sorted into three tiers (fast, standard, strong) and each tier
+maps to a model and a max_tokens budget. Per-model latency, token usage and
+estimated cost are recorded so runs can report where the time and money went.
+"""
+import threading
+from dataclasses import dataclass
+
+# Routing settings and their defaults. Every key can be overridden through the
+# environment / .env file (see ConfigurationManager in main.py).
+ROUTING_DEFAULTS = {
+    'MODEL_FAST': 'gpt-3.5-turbo',
+    'MODEL_STANDARD': 'gpt-3.5-turbo',
+    'MODEL_STRONG': 'gpt-3.5-turbo',
+    'MAX_TOKENS_FAST': 600,
+    'MAX_TOKENS_STANDARD': 1000,
+    'MAX_TOKENS_STRONG': 1500,
+    # Laravel file types that go to the fast tier when they are small and clean
+    'SIMPLE_FILE_TYPES': 'Config,Migration,Route,Service Provider',
+    # Files below this many lines count as trivial
+    'SIMPLE_FILE_LINES': 80,
+    # Languages whose scripts tokenize poorly get the larger ad budget
+    'AD_COMPLEX_LANGUAGES': 'zh,hi,ar,bn,ja,ko,th',
+    'MAX_TOKENS_AD': 500,
+    'MAX_TOKENS_AD_COMPLEX': 800,
+}
+
+# Approximate USD price per 1K tokens as (prompt, completion)
+MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4-turbo': (0.01, 0.03),
+}
+
+TIERS = ('fast', 'standard', 'strong')
+
+
+@dataclass(frozen=True)
+class Route:
+    """Model and token budget chosen for a single request"""
+    tier: str
+    model: str
+    max_tokens: int
+
+
+def _split_list(value):
+    """
+    Turn a comma separated setting into a set of stripped entries
+    """
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return {str(v).strip() for v in value if str(v).strip()}
+    return {v.strip() for v in str(value).split(',') if v.strip()}
+
+
+def _usage_value(usage, name):
+    """
+    Read a token count from either a new-style usage object or a legacy dict
+    """
+    if usage is None:
+        return 0
+    value = getattr(usage, name, None)
+    if value is None and hasattr(usage, 'get'):
+        value = usage.get(name)
+    return int(value or 0)
+
+
+def _cached_tokens(usage):
+    """
+    Read the provider's cached prompt token count, if the response reports one
+    """
+    if usage is None:
+        return 0
+    details = getattr(usage, 'prompt_tokens_details', None)
+    if details is None and hasattr(usage, 'get'):
+        details = usage.get('prompt_tokens_details')
+    return _usage_value(details, 'cached_tokens')
+
+
+def usage_counts(usage):
+    """
+    (prompt, completion, cached) token counts of a response's usage
+    """
+    return (_usage_value(usage, 'prompt_tokens'), _usage_value(usage, 'completion_tokens'),
+            _cached_tokens(usage))
+
+
+class ModelRouter:
+    """
+    Picks a model and max_tokens per request and records per-model stats
+    """
+    def __init__(self, settings=None):
+        self.settings = dict(ROUTING_DEFAULTS)
+        if settings:
+            self.settings.update({k: v for k, v in settings.items() if v is not None})
+
+        self.models = {tier: self.settings[f'MODEL_{tier.upper()}'] for tier in TIERS}
+        self.token_budgets = {tier: int(self.settings[f'MAX_TOKENS_{tier.upper()}']) for tier in TIERS}
+        self.simple_file_types = _split_list(self.settings['SIMPLE_FILE_TYPES'])
+        self.simple_file_lines = int(self.settings['SIMPLE_FILE_LINES'])
+        self.ad_complex_languages = _split_list(self.settings['AD_COMPLEX_LANGUAGES'])
+        self.ad_token_budget = int(self.settings['MAX_TOKENS_AD'])
+        self.ad_complex_token_budget = int(self.settings['MAX_TOKENS_AD_COMPLEX'])
+
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a router from anything with a ``get(key)`` method, such as
+        ConfigurationManager or ``os.environ``
+        """
+        return cls({key: config.get(key) for key in ROUTING_DEFAULTS})
+
+    def _route(self, tier, max_tokens=None):
+        return Route(
+            tier=tier,
+            model=self.models[tier],
+            max_tokens=max_tokens if max_tokens is not None else self.token_budgets[tier],
+        )
+
+    def route_analysis(self, file_type, complexity_report=None):
+        """
+        Route an analyzer request by Laravel file type and complexity report
+        """
+        if complexity_report is None:
+            return self._route('standard')
+
+        if any(complexity_report['exceeds_thresholds'].values()):
+            return self._route('strong')
+
+        if (file_type in self.simple_file_types
+                and complexity_report['total_lines'] <= self.simple_file_lines):
+            return self._route('fast')
+
+        return self._route('standard')
+
+    def route_ad(self, language_code):
+        """
+        Route an ad request by target language code
+        """
+        if language_code in self.ad_complex_languages:
+            return self._route('standard', self.ad_complex_token_budget)
+        return self._route('fast', self.ad_token_budget)
+
+    def record(self, model, latency, usage=None):
+        """
+        Record latency and token usage for one completed call
+        """
+        prompt_tokens, completion_tokens, cached_tokens = usage_counts(usage)
+        prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+        with self._lock:
+            entry = self._stats.setdefault(model, {
+                'calls': 0,
+                'latency_total': 0.0,
+                'latency_max': 0.0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'cached_tokens': 0,
+                'cost': 0.0,
+            })
+            entry['calls'] += 1
+            entry['latency_total'] += latency
+            entry['latency_max'] = max(entry['latency_max'], latency)
+            entry['prompt_tokens'] += prompt_tokens
+            entry['completion_tokens'] += completion_tokens
+            entry['cached_tokens'] += cached_tokens
+            entry['cost'] += cost
+
+    def stats(self):
+        """
+        Snapshot of per-model stats with average latency filled in
+        """
+        with self._lock:
+            snapshot = {model: dict(entry) for model, entry in self._stats.items()}
+        for entry in snapshot.values():
+            entry['latency_avg'] = entry['latency_total'] / entry['calls'] if entry['calls'] else 0.0
+        return snapshot
+
+    def format_stats(self):
+        """
+        Render per-model stats as plain text lines
+        """
+        lines = []
+        for model, entry in sorted(self.stats().items()):
+            lines.append(
+                f"{model}: {entry['calls']} calls, "
+                f"avg {entry['latency_avg']:.2f}s, max {entry['latency_max']:.2f}s, "
+                f"{entry['prompt_tokens']}+{entry['completion_tokens']} tokens "
+                f"({entry['cached_tokens']} cached), "
+                f"${entry['cost']:.4f}"
+            )
+        return "\n".join(lines)
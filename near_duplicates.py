@@ -0,0 +1,226 @@
+"""
+Near-duplicate detection for source files.
+
+Files are normalized (comments and whitespace stripped), fingerprinted with an
+exact hash and a MinHash signature over token shingles, and indexed with
+locality-sensitive hashing so each new file is compared only against likely
+matches. The analyzer uses this to analyze one representative per cluster of
+near-identical files (stock middleware, boilerplate migrations, generated
+providers) and reuse that analysis for the rest. Representatives' payloads
+are spooled to a temporary file, so only fingerprints stay in memory.
+"""
+import hashlib
+import json
+import re
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Mersenne prime used for the MinHash permutations; hashes are reduced to 32
+# bits so a * h + b stays inside uint64
+_PRIME = np.uint64((1 << 31) - 1)
+
+# String literals are matched first so comment markers inside them (URLs)
+# are kept; '#[' starts a PHP 8 attribute, not a comment
+_COMMENT_PATTERN = re.compile(
+    r"""('(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")|/\*.*?\*/|//[^\n]*|#(?!\[)[^\n]*""",
+    re.DOTALL
+)
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+# Declared class name; skips Foo::class and anonymous "new class extends ..."
+_CLASS_PATTERN = re.compile(r'(?<!::)\bclass\s+(?!(?:extends|implements)\b)([A-Za-z_]\w*)')
+
+
+def normalize_source(code):
+    """
+    Strip comments, mask the declared class name and collapse whitespace so
+    files that differ only in naming and formatting match
+    """
+    code = _COMMENT_PATTERN.sub(lambda m: m.group(1) or ' ', code)
+    name = class_name(code)
+    if name:
+        code = re.sub(rf'\b{name}\b', '__CLASS__', code)
+    return ' '.join(code.split())
+
+
+def _shingle_hashes(tokens, size):
+    """
+    32-bit hashes of every run of ``size`` consecutive tokens
+    """
+    if len(tokens) < size:
+        shingles = [' '.join(tokens)]
+    else:
+        shingles = [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+         for s in set(shingles)),
+        dtype=np.uint64
+    )
+
+
+@dataclass
+class Fingerprint:
+    """Exact hash and MinHash signature of one normalized file"""
+    exact_hash: str
+    signature: np.ndarray
+
+
+@dataclass
+class DuplicateMatch:
+    """A previously analyzed representative that a new file can reuse"""
+    representative: str
+    similarity: float
+    payload: object
+
+
+@dataclass
+class _Representative:
+    path: str
+    fingerprint: Fingerprint
+    payload_ref: tuple  # (offset, size) in the payload spool
+    members: List[str] = field(default_factory=list)
+
+
+class DuplicateIndex:
+    """
+    Online clustering of files by estimated Jaccard similarity.
+
+    ``match`` looks a file up against the representatives seen so far;
+    ``add`` registers a newly analyzed file as a representative together with
+    whatever payload (e.g. its chunk analyses) later members should reuse.
+    Payloads must be JSON-serializable; they are written to disk and read
+    back (as JSON, so tuples come back as lists) only when a file matches.
+    Files are only ever matched within the same group (e.g. Laravel file type).
+    """
+    def __init__(self, threshold=0.85, num_perm=64, bands=16, shingle_size=5, seed=42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._by_hash: Dict[tuple, _Representative] = {}
+        self._buckets: Dict[tuple, List[_Representative]] = {}
+        self._representatives: Dict[str, _Representative] = {}
+        self._spool = tempfile.TemporaryFile(prefix="duplicate_payloads_")
+        self._spool_lock = threading.Lock()
+
+    def fingerprint(self, code):
+        """
+        Exact hash plus MinHash signature of the normalized code
+        """
+        normalized = normalize_source(code)
+        exact_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        hashes = _shingle_hashes(_TOKEN_PATTERN.findall(normalized), self.shingle_size)
+        # One row per permutation, min over shingles
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        signature = permuted.min(axis=1)
+        return Fingerprint(exact_hash, signature)
+
+    def _store_payload(self, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        with self._spool_lock:
+            offset = self._spool.seek(0, 2)
+            self._spool.write(data)
+        return offset, len(data)
+
+    def _load_payload(self, payload_ref):
+        offset, size = payload_ref
+        with self._spool_lock:
+            self._spool.seek(offset)
+            data = self._spool.read(size)
+        return json.loads(data.decode('utf-8'))
+
+    def _band_keys(self, group, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield (group, band, rows.tobytes())
+
+    def match(self, group, fingerprint) -> Optional[DuplicateMatch]:
+        """
+        Find the most similar representative at or above the threshold
+        """
+        with self._lock:
+            exact = self._by_hash.get((group, fingerprint.exact_hash))
+            if exact is not None:
+                return DuplicateMatch(exact.path, 1.0, self._load_payload(exact.payload_ref))
+
+            candidates = {}
+            for key in self._band_keys(group, fingerprint.signature):
+                for rep in self._buckets.get(key, ()):
+                    candidates[rep.path] = rep
+
+            best, best_similarity = None, 0.0
+            for rep in candidates.values():
+                similarity = float(np.mean(rep.fingerprint.signature == fingerprint.signature))
+                if similarity > best_similarity:
+                    best, best_similarity = rep, similarity
+
+        if best is None or best_similarity < self.threshold:
+            return None
+        return DuplicateMatch(best.path, best_similarity, self._load_payload(best.payload_ref))
+
+    def add(self, group, path, fingerprint, payload):
+        """
+        Register an analyzed file as a cluster representative
+        """
+        rep = _Representative(path, fingerprint, self._store_payload(payload))
+        with self._lock:
+            self._representatives[path] = rep
+            self._by_hash.setdefault((group, fingerprint.exact_hash), rep)
+            for key in self._band_keys(group, fingerprint.signature):
+                self._buckets.setdefault(key, []).append(rep)
+
+    def add_member(self, representative, path):
+        """
+        Record that ``path`` reused the analysis of ``representative``
+        """
+        with self._lock:
+            self._representatives[representative].members.append(path)
+
+    def clusters(self):
+        """
+        Map each representative with members to the paths that reused it
+        """
+        with self._lock:
+            return {
+                rep.path: list(rep.members)
+                for rep in self._representatives.values()
+                if rep.members
+            }
+
+
+def class_name(code):
+    """
+    Name of the first class declared in the code, if any
+    """
+    match = _CLASS_PATTERN.search(code)
+    return match.group(1) if match else None
+
+
+def adapt_analysis(text, source_path, source_class, target_path, target_class):
+    """
+    Lightly adapt a reused analysis by swapping the representative's file and
+    class names for the member's
+    """
+    replacements = [(source_path, target_path)]
+    source_name = source_path.rsplit('/', 1)[-1]
+    target_name = target_path.rsplit('/', 1)[-1]
+    if source_name != target_name:
+        replacements.append((source_name, target_name))
+    if source_class and target_class and source_class != target_class:
+        replacements.append((source_class, target_class))
+
+    for old, new in replacements:
+        text = re.sub(rf'\b{re.escape(old)}\b', lambda _: new, text)
+    return text
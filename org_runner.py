@@ -0,0 +1,212 @@
+"""
+Multi-repository runner for the Laravel analyzer.
+
+Analyzes a list of repositories, or every Laravel repository in a GitHub
+organization, in parallel worker processes without interactive input. All
+workers share one on-disk response cache and one global rate limiter. Each
+repository gets its own Markdown report, plus an org-level index.md and
+index.json summarizing the run.
+
+Usage:
+    python org_runner.py https://github.com/acme/billing https://github.com/acme/crm
+    python org_runner.py --org acme --output-dir reports --processes 4
+    python org_runner.py --repos-file repos.txt
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+
+from main import ConfigurationManager, LaravelCodeAnalyzer, create_default_env
+from response_cache import ResponseCache, RateLimiter
+
+# Set in each worker process by _init_worker
+_worker_cache = None
+_worker_limiter = None
+
+
+def _init_worker(cache_path, rate_limiter):
+    """
+    Open the shared cache and keep the shared limiter in each worker process
+    """
+    global _worker_cache, _worker_limiter
+    _worker_cache = ResponseCache(cache_path)
+    _worker_limiter = rate_limiter
+
+
+def report_name(repo_url):
+    """
+    File name for a repository's report, e.g. acme__billing.md
+    """
+    owner, repo_name = repo_url.rstrip('/').split('/')[-2:]
+    return f"{owner}__{repo_name}.md"
+
+
+def analyze_one(repo_url, output_dir):
+    """
+    Analyze one repository in a worker process and return its summary
+    """
+    started = time.perf_counter()
+    # The worker's cache counts hits across every repo it has analyzed
+    hits_before = _worker_cache.hits if _worker_cache is not None else 0
+    output_path = os.path.join(output_dir, report_name(repo_url))
+    try:
+        analyzer = LaravelCodeAnalyzer(ConfigurationManager())
+        analyzer.console = Console(quiet=True)  # Workers report through the parent
+        analyzer.response_cache = _worker_cache
+        analyzer.rate_limiter = _worker_limiter
+
+        summary = analyzer.analyze_repository_to_file(repo_url, output_path)
+        summary.update({
+            'repo_url': repo_url,
+            # The analyzer logs and skips unreachable repos, so zero files means nothing was fetched
+            'status': 'ok' if summary['total_files'] else 'empty',
+            'models': analyzer.router.stats(),
+        })
+    except Exception as e:
+        summary = {'repo_url': repo_url, 'status': 'error', 'error': str(e), 'output_path': None}
+
+    summary['seconds'] = round(time.perf_counter() - started, 1)
+    if _worker_cache is not None:
+        summary['cache_hits'] = _worker_cache.hits - hits_before
+    return summary
+
+
+def list_org_repos(config_manager, org, include_all=False):
+    """
+    List repository URLs of a GitHub organization, keeping Laravel apps only
+    unless include_all is set (a repository counts as Laravel if it has an
+    ``artisan`` file at its root)
+    """
+    from github import Github
+
+    repo_urls = []
+    for repo in Github(config_manager.get('GITHUB_TOKEN')).get_organization(org).get_repos():
+        if repo.archived:
+            continue
+        if not include_all:
+            try:
+                repo.get_contents('artisan')
+            except Exception:
+                continue
+        repo_urls.append(repo.html_url)
+    return repo_urls
+
+
+def write_index(results, output_dir):
+    """
+    Write the org-level summary as index.md and index.json
+    """
+    results = sorted(results, key=lambda r: r['repo_url'])
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    total_files = sum(r.get('total_files', 0) for r in results)
+    total_issues = sum(r.get('files_with_issues', 0) for r in results)
+    failed = [r for r in results if r['status'] == 'error']
+    empty = [r for r in results if r['status'] == 'empty']
+
+    with open(os.path.join(output_dir, 'index.md'), 'w', encoding='utf-8') as f:
+        f.write("# Laravel Code Analysis Index\n\n")
+        f.write(f"Generated {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n")
+        f.write("## Summary Statistics\n\n")
+        f.write(f"- Repositories Analyzed: {len(results) - len(failed) - len(empty)}\n")
+        f.write(f"- Repositories Without Laravel Files: {len(empty)}\n")
+        f.write(f"- Repositories Failed: {len(failed)}\n")
+        f.write(f"- Total Files Analyzed: {total_files}\n")
+        f.write(f"- Files with Complexity Warnings: {total_issues}\n\n")
+
+        f.write("## Repositories\n\n")
+        f.write("| Repository | Files | Warnings | Duplicate Clusters | Time (s) | Report |\n")
+        f.write("|---|---:|---:|---:|---:|---|\n")
+        for r in results:
+            if r['status'] == 'ok':
+                report = os.path.basename(r['output_path'])
+                f.write(f"| {r['repo_url']} | {r['total_files']} | {r['files_with_issues']} | "
+                        f"{r.get('duplicate_clusters', 0)} | {r['seconds']} | [{report}]({report}) |\n")
+            elif r['status'] == 'empty':
+                f.write(f"| {r['repo_url']} | 0 | - | - | {r['seconds']} | No Laravel files found |\n")
+            else:
+                f.write(f"| {r['repo_url']} | - | - | - | {r['seconds']} | Error: {r['error']} |\n")
+
+
+def run(repo_urls, output_dir, processes, requests_per_minute, cache_path=None):
+    """
+    Analyze repositories across a process pool and write the index
+    """
+    console = Console()
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    cache_path = cache_path or os.path.join(output_dir, 'response_cache.sqlite')
+    rate_limiter = RateLimiter(requests_per_minute)
+
+    # Create the cache table before workers race to do it
+    ResponseCache(cache_path)
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(cache_path, rate_limiter)
+    ) as pool:
+        futures = {pool.submit(analyze_one, url, output_dir): url for url in repo_urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            if result['status'] != 'error':
+                console.print(f"[green]✓ [{done}/{len(futures)}] {result['repo_url']}[/green] "
+                              f"{result['total_files']} files, {result['files_with_issues']} with warnings")
+            else:
+                console.print(f"[red]✗ [{done}/{len(futures)}] {result['repo_url']}: {result['error']}[/red]")
+
+    write_index(results, output_dir)
+    console.print(f"Index written to {os.path.join(output_dir, 'index.md')}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many Laravel repositories in parallel")
+    parser.add_argument('repo_urls', nargs='*', help="Repository URLs")
+    parser.add_argument('--org', help="Analyze the Laravel repositories of this GitHub organization")
+    parser.add_argument('--include-all', action='store_true', help="With --org, do not filter to Laravel apps")
+    parser.add_argument('--repos-file', help="File with one repository URL per line")
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--requests-per-minute', type=int, default=None,
+                        help="Global OpenAI request budget (default: REQUESTS_PER_MINUTE from .env)")
+    parser.add_argument('--cache', help="Response cache path (default: <output-dir>/response_cache.sqlite)")
+    args = parser.parse_args(argv)
+
+    if not create_default_env():
+        return
+
+    try:
+        config_manager = ConfigurationManager()
+    except ValueError as e:
+        print(f"Configuration Error: {str(e)}")
+        return
+
+    repo_urls = list(args.repo_urls)
+    if args.repos_file:
+        with open(args.repos_file, encoding='utf-8') as f:
+            repo_urls += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if args.org:
+        repo_urls += list_org_repos(config_manager, args.org, args.include_all)
+    repo_urls = list(dict.fromkeys(repo_urls))
+
+    if not repo_urls:
+        parser.error("no repositories given (pass URLs, --repos-file or --org)")
+
+    requests_per_minute = args.requests_per_minute
+    if requests_per_minute is None:
+        requests_per_minute = config_manager.get('REQUESTS_PER_MINUTE')
+
+    run(repo_urls, args.output_dir, args.processes, requests_per_minute, args.cache)
+
+
+if __name__ == "__main__":
+    main()
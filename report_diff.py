@@ -0,0 +1,230 @@
+"""
+Compare two Laravel analysis runs.
+
+Matches files by path and content hash using the structured output written
+next to each Markdown report (see report_store.py) and reports what changed:
+added and removed files, new and resolved complexity warnings, metrics that
+got worse or better, and metrics only one run could measure. Only the older
+run's per-file metrics are held in memory; the newer run and the findings
+files are streamed.
+
+Usage:
+    python report_diff.py last_week.md this_week.md
+    python report_diff.py last_week.md this_week.md --findings
+    python report_diff.py last_week.md this_week.md --format json
+"""
+import argparse
+import difflib
+import json
+import sys
+
+from report_store import complexity_report, iter_file_records, iter_findings
+
+# Metrics where a higher value is worse
+METRICS = ('total_lines', 'method_count', 'long_methods')
+
+
+def compare_complexity(old_report, new_report):
+    """
+    Delta between two complexity_report dicts: warnings that appeared or
+    went away, metrics that grew or shrank as {name: (old, new)}, and
+    metrics measured in only one of the runs (the other is None) under
+    "unavailable"
+    """
+    old_flags = old_report['exceeds_thresholds']
+    new_flags = new_report['exceeds_thresholds']
+    # A flag missing from either run (failed analysis) is neither new nor resolved
+    compared = [name for name in new_flags if new_flags[name] is not None and old_flags.get(name) is not None]
+    delta = {
+        'new_warnings': [name for name in compared if new_flags[name] and not old_flags[name]],
+        'resolved_warnings': [name for name in compared if old_flags[name] and not new_flags[name]],
+        'worse': {},
+        'better': {},
+        'unavailable': {},
+    }
+    for name in METRICS:
+        old_value, new_value = old_report[name], new_report[name]
+        if old_value is None or new_value is None:
+            if old_value is not None or new_value is not None:
+                delta['unavailable'][name] = (old_value, new_value)
+        elif new_value > old_value:
+            delta['worse'][name] = (old_value, new_value)
+        elif new_value < old_value:
+            delta['better'][name] = (old_value, new_value)
+    return delta
+
+
+def diff_runs(old_report_path, new_report_path):
+    """
+    Yield one delta per file that differs between two runs, then one per
+    removed file. Files with the same content hash and metrics are skipped.
+    """
+    old_records = {
+        record['file_path']: (
+            record.get('content_sha256'), complexity_report(record),
+            record.get('chunk_errors') or 0, bool(record.get('error')),
+        )
+        for record in iter_file_records(old_report_path)
+    }
+
+    for record in iter_file_records(new_report_path):
+        file_path = record['file_path']
+        new_report = complexity_report(record)
+        chunk_errors = record.get('chunk_errors') or 0
+        old = old_records.pop(file_path, None)
+
+        if old is None:
+            yield {
+                'file_path': file_path,
+                'status': 'added',
+                'new_warnings': [name for name, flagged in new_report['exceeds_thresholds'].items() if flagged],
+                'resolved_warnings': [],
+                'worse': {},
+                'better': {},
+                'unavailable': {},
+                'analysis_failed': bool(record.get('error') or chunk_errors),
+            }
+            continue
+
+        old_hash, old_report, old_chunk_errors, old_error = old
+        delta = compare_complexity(old_report, new_report)
+        content_changed = old_hash != record.get('content_sha256')
+        # A failed analysis is only news if the previous run did not fail too
+        analysis_failed = (bool(record.get('error')) and not old_error) or chunk_errors > old_chunk_errors
+        if not content_changed and not analysis_failed and not any(delta.values()):
+            continue
+
+        yield {
+            'file_path': file_path,
+            'status': 'changed' if content_changed else 'same content',
+            **delta,
+            'analysis_failed': analysis_failed,
+        }
+
+    for file_path, (_, old_report, _, _) in old_records.items():
+        yield {
+            'file_path': file_path,
+            'status': 'removed',
+            'new_warnings': [],
+            'resolved_warnings': [name for name, flagged in old_report['exceeds_thresholds'].items() if flagged],
+            'worse': {},
+            'better': {},
+            'unavailable': {},
+            'analysis_failed': False,
+        }
+
+
+def findings_diff(old_report_path, new_report_path, file_paths, context=1, max_lines=40):
+    """
+    Yield (file_path, diff lines) comparing the per-chunk findings of the
+    given files, reading only those files' entries from either run
+    """
+    wanted = set(file_paths)
+    old_findings = {
+        record['file_path']: record.get('findings') or []
+        for record in iter_findings(old_report_path, wanted)
+    }
+    for record in iter_findings(new_report_path, wanted):
+        old = '\n\n'.join(old_findings.pop(record['file_path'], [])).splitlines()
+        new = '\n\n'.join(record.get('findings') or []).splitlines()
+        lines = list(difflib.unified_diff(old, new, 'previous', 'current', n=context, lineterm=''))
+        if lines:
+            if len(lines) > max_lines:
+                lines = lines[:max_lines] + [f"... {len(lines) - max_lines} more lines"]
+            yield record['file_path'], lines
+
+
+def _format_metrics(metrics):
+    return ', '.join(
+        f"{name} {old} -> {new} ({new - old:+d})" for name, (old, new) in metrics.items()
+    )
+
+
+def _format_unavailable(metrics):
+    return ', '.join(
+        f"{name} {'n/a' if old is None else old} -> {'n/a' if new is None else new}"
+        for name, (old, new) in metrics.items()
+    )
+
+
+def print_delta(deltas, out=sys.stdout):
+    """
+    Print a compact summary of file deltas grouped by kind of change and
+    return the paths whose content changed
+    """
+    groups = {
+        'New warnings': [],
+        'Resolved warnings': [],
+        'Worse metrics': [],
+        'Better metrics': [],
+        'Measured in one run only': [],
+        'Analysis failed': [],
+        'Added files': [],
+        'Removed files': [],
+    }
+    counts = {'added': 0, 'removed': 0, 'changed': 0, 'same content': 0}
+    changed_paths = []
+
+    for delta in deltas:
+        file_path = delta['file_path']
+        counts[delta['status']] += 1
+        if delta['status'] == 'added':
+            groups['Added files'].append(file_path)
+        elif delta['status'] == 'removed':
+            groups['Removed files'].append(file_path)
+        elif delta['status'] == 'changed':
+            changed_paths.append(file_path)
+
+        if delta['new_warnings']:
+            groups['New warnings'].append(f"{file_path}: {', '.join(delta['new_warnings'])}")
+        if delta['resolved_warnings'] and delta['status'] != 'removed':
+            groups['Resolved warnings'].append(f"{file_path}: {', '.join(delta['resolved_warnings'])}")
+        if delta['worse']:
+            groups['Worse metrics'].append(f"{file_path}: {_format_metrics(delta['worse'])}")
+        if delta['better']:
+            groups['Better metrics'].append(f"{file_path}: {_format_metrics(delta['better'])}")
+        if delta['unavailable']:
+            groups['Measured in one run only'].append(f"{file_path}: {_format_unavailable(delta['unavailable'])}")
+        if delta['analysis_failed']:
+            groups['Analysis failed'].append(file_path)
+
+    out.write(f"Files added: {counts['added']}, removed: {counts['removed']}, "
+              f"changed: {counts['changed']}, unchanged content with new results: {counts['same content']}\n")
+    for title, lines in groups.items():
+        if lines:
+            out.write(f"\n{title} ({len(lines)}):\n")
+            for line in lines:
+                out.write(f"  {line}\n")
+    return changed_paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two Laravel analysis runs")
+    parser.add_argument('old_report', help="Markdown report of the earlier run")
+    parser.add_argument('new_report', help="Markdown report of the later run")
+    parser.add_argument('--findings', action='store_true', help="Also diff the findings of changed files")
+    parser.add_argument('--format', choices=['text', 'json'], default='text',
+                        help="json prints one delta per line")
+    args = parser.parse_args(argv)
+
+    try:
+        deltas = diff_runs(args.old_report, args.new_report)
+        if args.format == 'json':
+            for delta in deltas:
+                print(json.dumps(delta, ensure_ascii=False))
+            return 0
+
+        changed_paths = print_delta(deltas)
+        if args.findings and changed_paths:
+            print("\nFindings of changed files:")
+            for file_path, lines in findings_diff(args.old_report, args.new_report, changed_paths):
+                print(f"\n{file_path}")
+                print('\n'.join(lines))
+    except FileNotFoundError as e:
+        print(f"No structured report found: {e.filename}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
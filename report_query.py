@@ -0,0 +1,146 @@
+"""
+Query the structured output of a Laravel analysis run.
+
+Works on the JSON lines written next to a Markdown report (see
+report_store.py): filters and sorts the per-file metrics with pandas and only
+reads the findings file when a Markdown report is rendered.
+
+Usage:
+    python report_query.py files laravel_analysis_report.md --warnings --sort total_lines --desc
+    python report_query.py files laravel_analysis_report.md --type Controller --path 'app/Http/*' --format json
+    python report_query.py summary laravel_analysis_report.md
+    python report_query.py render laravel_analysis_report.md controllers.md --type Controller --warnings
+"""
+import argparse
+import fnmatch
+import sys
+
+from report_store import load_files, load_run_info, render_markdown
+
+DEFAULT_COLUMNS = [
+    'file_path', 'file_type', 'total_lines', 'method_count', 'long_methods',
+    'has_warnings', 'model', 'prompt_tokens', 'completion_tokens', 'duration_ms',
+]
+
+
+def select_files(frame, file_type=None, warnings=False, errors=False, path=None, min_lines=None,
+                 sort=None, descending=False, limit=None):
+    """
+    Filter and sort the per-file metrics frame
+    """
+    mask = frame['file_path'].notna()
+    if file_type:
+        mask &= frame['file_type'].str.lower() == file_type.lower()
+    if warnings:
+        mask &= frame['has_warnings'].fillna(False).astype(bool)
+    if errors:
+        mask &= frame['error'].notna() | (frame['chunk_errors'].fillna(0) > 0)
+    if path:
+        mask &= frame['file_path'].str.match(fnmatch.translate(path))
+    if min_lines is not None:
+        mask &= frame['total_lines'].fillna(0) >= min_lines
+
+    selected = frame[mask]
+    if sort:
+        if sort not in selected.columns:
+            raise ValueError(f"Unknown column '{sort}'. Available: {', '.join(selected.columns)}")
+        selected = selected.sort_values(sort, ascending=not descending, kind='stable')
+    if limit:
+        selected = selected.head(limit)
+    return selected
+
+
+def summarize(frame):
+    """
+    Per file type totals of files, warnings, lines, tokens and time
+    """
+    summary = frame.assign(
+        warnings=frame['has_warnings'].fillna(False).astype(int),
+        tokens=frame['prompt_tokens'].fillna(0) + frame['completion_tokens'].fillna(0),
+    ).groupby('file_type').agg(
+        files=('file_path', 'size'),
+        warnings=('warnings', 'sum'),
+        lines=('total_lines', 'sum'),
+        calls=('calls', 'sum'),
+        tokens=('tokens', 'sum'),
+        seconds=('duration_ms', lambda ms: round(ms.sum() / 1000, 1)),
+    )
+    return summary.sort_values('files', ascending=False)
+
+
+def _add_filters(parser):
+    parser.add_argument('--type', dest='file_type', help="Only this file type (e.g. Controller)")
+    parser.add_argument('--warnings', action='store_true', help="Only files with complexity warnings")
+    parser.add_argument('--errors', action='store_true', help="Only files whose analysis failed")
+    parser.add_argument('--path', help="Only paths matching this glob")
+    parser.add_argument('--min-lines', type=int)
+    parser.add_argument('--sort', help="Column to sort by")
+    parser.add_argument('--desc', action='store_true', help="Sort descending")
+    parser.add_argument('--limit', type=int)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a structured Laravel analysis report")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    files = commands.add_parser('files', help="List per-file metrics")
+    files.add_argument('report', help="Markdown report path the structured files belong to")
+    _add_filters(files)
+    files.add_argument('--columns', help="Comma-separated columns to show")
+    files.add_argument('--format', choices=['table', 'json', 'paths'], default='table')
+
+    summary = commands.add_parser('summary', help="Totals by file type and model usage")
+    summary.add_argument('report')
+
+    render = commands.add_parser('render', help="Render Markdown for the selected files")
+    render.add_argument('report')
+    render.add_argument('output', help="Markdown file to write")
+    _add_filters(render)
+
+    args = parser.parse_args(argv)
+
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("pandas package not installed. Run: pip install pandas")
+        return 1
+
+    try:
+        frame = load_files(args.report)
+    except FileNotFoundError as e:
+        print(f"No structured report found: {e.filename}")
+        return 1
+
+    if args.command == 'summary':
+        run_info = load_run_info(args.report)
+        print(f"Repository: {run_info.get('repo_url', '-')}")
+        print(f"Files: {len(frame)}, with warnings: {int(frame['has_warnings'].fillna(False).sum())}\n")
+        print(summarize(frame).to_string())
+        for model, stats in run_info.get('models', {}).items():
+            print(f"\n{model}: {stats['calls']} calls, {stats['prompt_tokens']} prompt / "
+                  f"{stats['completion_tokens']} completion tokens, ${stats['cost']:.4f}")
+        return 0
+
+    try:
+        selected = select_files(frame, args.file_type, args.warnings, args.errors, args.path,
+                                args.min_lines, args.sort, args.desc, args.limit)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == 'render':
+        summary = render_markdown(args.report, args.output, selected['file_path'])
+        print(f"Wrote {summary['total_files']} files to {summary['output_path']}")
+        return 0
+
+    if args.format == 'paths':
+        print('\n'.join(selected['file_path']))
+    elif args.format == 'json':
+        print(selected.to_json(orient='records', lines=True, force_ascii=False))
+    else:
+        columns = args.columns.split(',') if args.columns else [c for c in DEFAULT_COLUMNS if c in selected.columns]
+        print(selected[columns].to_string(index=False) if len(selected) else "No matching files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Report output for the Laravel analyzer.
+
+ReportWriter produces the Markdown report. StructuredReportWriter writes the
+same run as machine-readable JSON lines next to it:
+
+    <report>.files.jsonl     one flat record of metrics, routing, token usage
+                             and timings per file (small, fast to query)
+    <report>.findings.jsonl  per-chunk findings and the rendered section per file
+    <report>.run.json        run metadata (thresholds, clusters, model stats)
+
+load_files() reads the metrics into a pandas DataFrame (cached as Parquet when
+pyarrow is available) and render_markdown() rebuilds a Markdown report, or a
+filtered subset of one, from the structured store.
+"""
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+# Record keys that go to the findings file instead of the metrics file
+FINDINGS_KEYS = ('findings', 'analysis')
+
+# Metric columns of an analyzer record (see LaravelCodeAnalyzer.analyze_file);
+# load_files adds any a store lacks as empty columns
+FILE_COLUMNS = (
+    'file_path', 'file_type', 'content_sha256', 'has_warnings', 'tier', 'model', 'duplicate_of',
+    'similarity', 'chunks', 'chunk_errors', 'error', 'total_lines', 'method_count', 'long_methods',
+    'file_too_long', 'too_many_methods', 'has_long_methods', 'calls', 'cached_responses',
+    'prompt_tokens', 'completion_tokens', 'cached_tokens', 'duration_ms',
+)
+
+
+class ReportWriter:
+    """
+    Streams per-file analyses into the Markdown report.
+
+    Sections are spooled to one temporary file per file type as they arrive,
+    and only paths and counters stay in memory; close() writes the summary
+    and stitches the spooled sections together.
+    """
+    def __init__(self, output_path="laravel_analysis_report.md"):
+        self.output_path = output_path
+        self.total_files = 0
+        self.flagged_files = []
+        self.clusters = {}  # Representative path -> paths that reused its analysis
+        self._spool_dir = tempfile.TemporaryDirectory(prefix="laravel_report_")
+        self._groups = {}
+
+    def add(self, file_path, analysis):
+        """
+        Append one file's analysis to the report
+        """
+        self.total_files += 1
+        if "⚠️ Complexity Warnings" in analysis:
+            self.flagged_files.append(file_path)
+
+        # Group files by type
+        file_type = file_path.split('/')[1] if '/' in file_path else 'Other'
+        spool = self._groups.get(file_type)
+        if spool is None:
+            spool_path = os.path.join(self._spool_dir.name, f"{len(self._groups)}.md")
+            spool = open(spool_path, 'w+', encoding='utf-8')
+            self._groups[file_type] = spool
+
+        spool.write(f"### {file_path}\n\n")
+        spool.write(analysis)
+        spool.write("\n\n---\n\n")
+
+    def close(self):
+        """
+        Write the final report and return its summary counts
+        """
+        try:
+            with open(self.output_path, 'w', encoding='utf-8') as f:
+                f.write("# Laravel Code Analysis Report\n\n")
+                
+                # Add summary section
+                f.write("## Summary Statistics\n\n")
+                f.write(f"- Total Files Analyzed: {self.total_files}\n")
+                f.write(f"- Files with Complexity Warnings: {len(self.flagged_files)}\n")
+                reused = sum(len(members) for members in self.clusters.values())
+                if reused:
+                    f.write(f"- Near-Duplicate Files (analysis reused): {reused}\n")
+                f.write("\n")
+                
+                if self.flagged_files:
+                    f.write("### Files Needing Attention\n\n")
+                    for file_path in self.flagged_files:
+                        f.write(f"- {file_path}\n")
+                    f.write("\n")
+
+                if self.clusters:
+                    f.write("### Near-Duplicate Clusters\n\n")
+                    for representative, members in self.clusters.items():
+                        f.write(f"- {representative} (analyzed): {', '.join(members)}\n")
+                    f.write("\n")
+                
+                # Write detailed analysis
+                for file_type, spool in self._groups.items():
+                    f.write(f"## {file_type}\n\n")
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, f)
+        finally:
+            for spool in self._groups.values():
+                spool.close()
+            self._groups = {}
+            self._spool_dir.cleanup()
+
+        return {
+            'output_path': self.output_path,
+            'total_files': self.total_files,
+            'files_with_issues': len(self.flagged_files),
+            'duplicate_clusters': len(self.clusters),
+        }
+
+
+def structured_paths(report_path):
+    """
+    Paths of the structured files that belong to a Markdown report
+    """
+    base = report_path[:-3] if report_path.endswith('.md') else report_path
+    return {
+        'files': f"{base}.files.jsonl",
+        'findings': f"{base}.findings.jsonl",
+        'run': f"{base}.run.json",
+    }
+
+
+class StructuredReportWriter:
+    """
+    Streams per-file records into the JSONL store next to a Markdown report
+    """
+    def __init__(self, report_path="laravel_analysis_report.md", run_info=None):
+        self.paths = structured_paths(report_path)
+        self.run_info = dict(run_info or {})
+        self.run_info.setdefault('started', datetime.now().isoformat(timespec='seconds'))
+        self._files = open(self.paths['files'], 'w', encoding='utf-8')
+        self._findings = open(self.paths['findings'], 'w', encoding='utf-8')
+
+    def add(self, record):
+        """
+        Write one file record, splitting metrics from findings
+        """
+        metrics = {k: v for k, v in record.items() if k not in FINDINGS_KEYS}
+        findings = {'file_path': record['file_path']}
+        findings.update({k: record.get(k) for k in FINDINGS_KEYS})
+        self._files.write(json.dumps(metrics, ensure_ascii=False) + "\n")
+        self._findings.write(json.dumps(findings, ensure_ascii=False) + "\n")
+
+    def close(self, **run_info):
+        """
+        Finish the store and write the run metadata
+        """
+        self._files.close()
+        self._findings.close()
+        self.run_info.update(run_info)
+        self.run_info['finished'] = datetime.now().isoformat(timespec='seconds')
+        with open(self.paths['run'], 'w', encoding='utf-8') as f:
+            json.dump(self.run_info, f, indent=2, ensure_ascii=False)
+
+
+def load_files(report_path):
+    """
+    Load the per-file metrics of a run into a DataFrame.
+
+    A Parquet copy is written beside the JSONL on first load (when pyarrow is
+    installed) and reused while it is strictly newer than the JSONL and was
+    built from a JSONL of the same size, so a rewrite within the same mtime
+    tick is not missed. Columns of FILE_COLUMNS that the run did not record
+    (e.g. reports saved from plain analysis text) are present but empty.
+    """
+    import pandas as pd
+
+    paths = structured_paths(report_path)
+    jsonl_path = paths['files']
+    parquet_path = jsonl_path[:-len('.jsonl')] + '.parquet'
+    jsonl_stat = os.stat(jsonl_path)
+
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) > jsonl_stat.st_mtime:
+        try:
+            frame = pd.read_parquet(parquet_path)
+        except ImportError:
+            pass
+        else:
+            if frame.attrs.get('jsonl_size') == jsonl_stat.st_size:
+                return frame
+
+    frame = pd.read_json(jsonl_path, lines=True, dtype=False)
+    missing = [column for column in FILE_COLUMNS if column not in frame.columns]
+    frame = frame.reindex(columns=[*frame.columns, *missing])
+    frame.attrs['jsonl_size'] = jsonl_stat.st_size
+    try:
+        frame.to_parquet(parquet_path, index=False)
+    except (ImportError, ValueError, OSError):
+        pass  # No Parquet engine; JSONL stays the source of truth
+    return frame
+
+
+def load_run_info(report_path):
+    """
+    Run metadata (thresholds, clusters, model stats) for a report
+    """
+    with open(structured_paths(report_path)['run'], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_file_records(report_path):
+    """
+    Stream the per-file metric records of a run without loading them all
+    """
+    with open(structured_paths(report_path)['files'], encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def complexity_report(record):
+    """
+    Rebuild the analyzer's complexity_report dict from a file record.
+
+    Metrics and flags the record lacks (the file failed before it was
+    measured) are None rather than 0, so they can be told apart.
+    """
+    flags = ('file_too_long', 'too_many_methods', 'has_long_methods')
+    return {
+        'total_lines': record.get('total_lines'),
+        'method_count': record.get('method_count'),
+        'long_methods': record.get('long_methods'),
+        'exceeds_thresholds': {
+            name: None if record.get(name) is None else bool(record[name]) for name in flags
+        }
+    }
+
+
+def iter_findings(report_path, file_paths=None):
+    """
+    Stream findings records, optionally only for the given file paths
+    """
+    wanted = set(file_paths) if file_paths is not None else None
+    with open(structured_paths(report_path)['findings'], encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if wanted is None or record['file_path'] in wanted:
+                yield record
+
+
+def render_markdown(report_path, output_path, file_paths=None):
+    """
+    Render a Markdown report from the structured store, optionally limited to
+    (and ordered by) the given file paths
+    """
+    if file_paths is not None:
+        file_paths = list(file_paths)
+        sections = {r['file_path']: r['analysis'] for r in iter_findings(report_path, file_paths)}
+        ordered = ((path, sections[path]) for path in file_paths if path in sections)
+    else:
+        ordered = ((r['file_path'], r['analysis']) for r in iter_findings(report_path))
+
+    writer = ReportWriter(output_path)
+    try:
+        writer.clusters = load_run_info(report_path).get('clusters', {})
+    except FileNotFoundError:
+        pass
+    if file_paths is not None:
+        selected = set(file_paths)
+        writer.clusters = {
+            rep: [m for m in members if m in selected]
+            for rep, members in writer.clusters.items()
+            if rep in selected
+        }
+        writer.clusters = {rep: members for rep, members in writer.clusters.items() if members}
+    for file_path, analysis in ordered:
+        writer.add(file_path, analysis)
+    return writer.close()
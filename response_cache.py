@@ -0,0 +1,100 @@
+"""
+Process-safe response cache and rate limiter for analysis runs.
+
+ResponseCache stores model responses in a SQLite file keyed by a hash of the
+full request, so parallel worker processes (and later runs) reuse each
+other's answers for identical prompts. RateLimiter spaces requests evenly
+across every process that shares it.
+"""
+import hashlib
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of completion text keyed by request hash
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Hash the request parts (model, max_tokens, messages...) into a cache key
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached response for key, or None
+        """
+        row = self._connect().execute(
+            "SELECT response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, response):
+        """
+        Store a response; an existing entry for the key is kept
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+
+
+class RateLimiter:
+    """
+    Evenly spaced request limiter shared across processes.
+
+    Holds the next free send slot in shared memory; each acquire() claims
+    the slot, moves it forward by one interval and sleeps until its turn.
+    Create it in the parent and pass it to workers (e.g. via a pool
+    initializer).
+    """
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = multiprocessing.Value('d', 0.0)
+
+    def acquire(self):
+        """
+        Block until this caller may send one request
+        """
+        if not self.interval:
+            return
+        with self._next_slot.get_lock():
+            now = time.time()
+            slot = max(self._next_slot.value, now)
+            self._next_slot.value = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,107 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls that share a key are collapsed into one upstream call; the
+first caller runs it and everyone else waits for and receives the same result
+(or exception). Once the call finishes the key is released, so later calls run
+again - this is deduplication of in-flight work, not a cache.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    """One in-flight call and the event its followers wait on"""
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-based single-flight group (Streamlit sessions, worker threads)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` unless a call with the same key is already
+        running, in which case wait for it and return its result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self):
+        """Number of distinct keys currently running"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    asyncio single-flight group; must be used from a single event loop
+    """
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """
+        Await ``coro_fn(*args, **kwargs)`` unless a call with the same key is
+        already running, in which case await that one instead
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _release(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def in_flight(self):
+        """Number of distinct keys currently running"""
+        return len(self._calls)
+
+    def cancel_all(self):
+        """Cancel every running call"""
+        for task in list(self._calls.values()):
+            task.cancel()
@@ -0,0 +1,168 @@
+"""
+Non-blocking, structured logging shared by the ad app and the analyzer.
+
+Every logger call only puts the record on an in-memory queue (QueueHandler);
+a single background QueueListener thread does the formatting and the file and
+console I/O. File records are JSON lines carrying the request id of the code
+that logged them (set with ``request_context``) and any timing fields passed
+through ``extra``.
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Request id of the current request / task; copied into every log record
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_setup_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request id in the logging thread"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, message and extra fields"""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Plain text console lines with the request id when there is one"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        request_id = getattr(record, 'request_id', None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+def setup_logging(log_file=None, level=logging.INFO, console=True, console_handler=None,
+                  max_bytes=1024*1024, backup_count=5):
+    """
+    Route all logging through a queue to a background listener (once per process).
+
+    ``console_handler`` replaces the default stderr handler, e.g. a Rich
+    handler that cooperates with a live progress display. Returns True when
+    this call installed the handlers. File handler errors fall back to
+    console-only logging with a warning.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return False
+
+        handlers = []
+        if console:
+            if console_handler is None:
+                console_handler = logging.StreamHandler()
+                console_handler.setFormatter(ConsoleFormatter())
+            handlers.append(console_handler)
+
+        file_error = None
+        if log_file is not None:
+            try:
+                log_file.parent.mkdir(parents=True, exist_ok=True)
+                file_handler = logging.handlers.RotatingFileHandler(
+                    filename=str(log_file),
+                    maxBytes=max_bytes,
+                    backupCount=backup_count,
+                    encoding='utf-8'
+                )
+                file_handler.setFormatter(JsonFormatter())
+                handlers.append(file_handler)
+            except Exception as e:
+                file_error = e
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        _queue_handler = queue_handler
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+    if file_error is not None:
+        logging.warning(f"Failed to setup file logging: {str(file_error)}. Falling back to console logging.")
+    return True
+
+
+def shutdown_logging():
+    """
+    Flush queued records and stop the listener thread
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _listener.stop()
+            _listener = None
+            _queue_handler = None
+
+
+@contextlib.contextmanager
+def request_context(request_id=None):
+    """
+    Tag every record logged inside the block with a request id
+    """
+    request_id = request_id or uuid.uuid4().hex[:12]
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+
+@contextlib.contextmanager
+def log_timing(logger, message, level=logging.INFO, **fields):
+    """
+    Log ``message`` with ``duration_ms`` (and any extra fields) when the block exits
+    """
+    started = time.perf_counter()
+    outcome = {'status': 'ok'}
+    try:
+        yield outcome
+    except Exception:
+        outcome['status'] = 'error'
+        raise
+    finally:
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.log(level, message, extra={**fields, **outcome, 'duration_ms': duration_ms})
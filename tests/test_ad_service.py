@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ad_service import AdService  # noqa: E402
+from structured_logging import RequestIdFilter  # noqa: E402
+
+logger = logging.getLogger('tests.ad_service')
+
+
+class _CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.addFilter(RequestIdFilter())
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class _FakeGenerator:
+    """Logs one "Ad model call" per generation, like AdGenerator does"""
+
+    def generate_ad(self, product, language):
+        time.sleep(0.05)
+        logger.info("Ad model call", extra={'product': product})
+        return {'Headline': product}
+
+
+async def _post(app, path, body, request_id):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode()}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': [(b'x-request-id', request_id.encode())]}
+    await app(scope, receive, send)
+    return messages[0]['status']
+
+
+class RequestIdPropagationTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = _CapturingHandler()
+        logger.addHandler(self.handler)
+        logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        logger.removeHandler(self.handler)
+
+    def test_each_request_logs_its_own_id(self):
+        async def run():
+            app = AdService(_FakeGenerator(), workers=1, queue_size=4)
+            try:
+                # The first request starts the workers; the second must not inherit its id
+                first = await _post(app, '/generate', {'product': 'tea', 'language': 'English'}, 'req-first')
+                second = await _post(app, '/generate', {'product': 'coffee', 'language': 'English'}, 'req-second')
+            finally:
+                await app.stop()
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), (200, 200))
+        logged = {record.product: record.request_id for record in self.handler.records}
+        self.assertEqual(logged, {'tea': 'req-first', 'coffee': 'req-second'})
+
+
+class BackpressureTest(unittest.TestCase):
+    def test_burst_fills_idle_workers_before_rejecting(self):
+        async def run():
+            app = AdService(_FakeGenerator(), workers=2, queue_size=2)
+            try:
+                return await asyncio.gather(*(
+                    _post(app, '/generate', {'product': f'tea {i}', 'language': 'English'}, f'req-{i}')
+                    for i in range(8)
+                ))
+            finally:
+                await app.stop()
+
+        statuses = asyncio.run(run())
+        # Two running plus two waiting; the rest are turned away
+        self.assertEqual(sorted(statuses), [200] * 4 + [503] * 4)
+
+
+class BatchValidationTest(unittest.TestCase):
+    def test_fix_lengths_must_be_a_boolean(self):
+        async def run():
+            app = AdService(_FakeGenerator(), workers=1)
+            try:
+                return [
+                    await _post(app, '/generate/batch', {
+                        'items': [{'product': 'tea', 'language': 'English'}], 'fix_lengths': value,
+                    }, f'req-{index}')
+                    for index, value in enumerate(["false", 0, None, False])
+                ]
+            finally:
+                await app.stop()
+
+        self.assertEqual(asyncio.run(run()), [400, 400, 400, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_router import Route  # noqa: E402
+from work_queue import TaskStore  # noqa: E402
+
+COMPLEXITY = {
+    'total_lines': 10,
+    'method_count': 1,
+    'long_methods': 0,
+    'exceeds_thresholds': {'file_too_long': False, 'too_many_methods': False, 'has_long_methods': False},
+}
+
+
+class TaskStoreLeaseTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.store = TaskStore(os.path.join(self._dir.name, 'queue.sqlite'), max_attempts=2)
+        self.store.add_file('run', 0, 'https://github.com/acme/app', 'app/A.php', COMPLEXITY,
+                            ['chunk'], Route('fast', 'model', 100))
+
+    def tearDown(self):
+        self.store.conn.close()
+        self._dir.cleanup()
+
+    def test_live_lease_is_not_handed_out_again(self):
+        self.assertEqual(len(self.store.claim('first', lease_seconds=300)), 1)
+        self.assertEqual(self.store.claim('second', lease_seconds=300), [])
+
+    def test_expired_lease_is_claimed_by_another_worker(self):
+        task, = self.store.claim('first', lease_seconds=0.01)
+        time.sleep(0.05)
+        reclaimed, = self.store.claim('second', lease_seconds=300)
+        self.assertEqual(reclaimed['id'], task['id'])
+
+    def test_complete_after_losing_the_lease_is_ignored(self):
+        task, = self.store.claim('first', lease_seconds=0.01)
+        time.sleep(0.05)
+        self.store.claim('second', lease_seconds=300)
+
+        self.assertFalse(self.store.complete(task['id'], 'first', 'stale result'))
+        self.assertTrue(self.store.complete(task['id'], 'second', 'result'))
+        _, _, _, _, results = next(self.store.iter_files('run'))
+        self.assertEqual(results, ['result'])
+
+    def test_failures_stop_at_max_attempts(self):
+        task, = self.store.claim('worker')
+        self.store.fail(task['id'], 'worker', 'boom')
+        self.assertEqual(self.store.counts(), {'pending': 1})
+
+        task, = self.store.claim('worker')
+        self.store.fail(task['id'], 'worker', 'boom')
+        self.assertEqual(self.store.counts(), {'failed': 1})
+        self.assertEqual(self.store.claim('worker'), [])
+
+    def test_expired_lease_at_max_attempts_is_failed(self):
+        for _ in range(2):
+            self.store.claim('worker', lease_seconds=0.01)
+            time.sleep(0.05)
+
+        self.assertEqual(self.store.claim('worker'), [])
+        self.assertEqual(self.store.counts(), {'failed': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
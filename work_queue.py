@@ -0,0 +1,360 @@
+"""
+Distributed work queue for Laravel analysis.
+
+A coordinator walks a repository and enqueues one task per code chunk into a
+shared SQLite store. Worker processes on any node that can reach the store
+(e.g. on a shared volume) claim tasks under time-limited leases, run
+LaravelCodeAnalyzer.analyze_laravel_code_chunk and write the results back. A
+worker that dies simply lets its lease expire, and the task is handed to the
+next worker that asks. Once every task is done, the results are assembled into
+the usual Markdown report and structured store by save_analysis_to_file.
+
+Usage:
+    python work_queue.py enqueue https://github.com/acme/billing --db queue.sqlite
+    python work_queue.py worker --db queue.sqlite --exit-when-empty   # on each node
+    python work_queue.py status --db queue.sqlite
+    python work_queue.py assemble --run-id <id> --db queue.sqlite --output report.md
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from dataclasses import asdict
+
+from main import ConfigurationManager, LaravelCodeAnalyzer, create_default_env, save_analysis_to_file
+from model_router import Route
+from response_cache import ResponseCache
+from structured_logging import setup_logging, request_context, log_timing
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    repo_url TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    complexity TEXT NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    content_sha256 TEXT,
+    PRIMARY KEY (run_id, file_path)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    code_chunk TEXT NOT NULL,
+    route TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    UNIQUE (run_id, file_path, chunk_index)
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (status, lease_expires);
+"""
+
+
+class TaskStore:
+    """
+    SQLite-backed task table with lease-based claiming
+    """
+    def __init__(self, path="analysis_queue.sqlite", max_attempts=3):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        # Autocommit mode; transactions are opened explicitly where needed
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        # Rollback journal, not WAL: WAL's shared-memory index only works when
+        # every process is on one host, and workers run on several nodes
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(_SCHEMA)
+        # Stores created before content hashes were recorded
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(files)")}
+        if 'content_sha256' not in columns:
+            self.conn.execute("ALTER TABLE files ADD COLUMN content_sha256 TEXT")
+
+    def add_file(self, run_id, seq, repo_url, file_path, complexity_report, chunks, route, content_sha256=None):
+        """
+        Record one file and enqueue a task per chunk
+        """
+        route_json = json.dumps(asdict(route))
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files "
+                "(run_id, seq, repo_url, file_path, complexity, total_chunks, content_sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, seq, repo_url, file_path, json.dumps(complexity_report), len(chunks), content_sha256)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (run_id, file_path, chunk_index, total_chunks, code_chunk, route) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, file_path, i, len(chunks), chunk, route_json) for i, chunk in enumerate(chunks)]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker_id, lease_seconds=300, limit=1):
+        """
+        Lease up to ``limit`` pending tasks, including tasks whose lease expired
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases that used up their attempts are given up on
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired', lease_owner = NULL "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            rows = self.conn.execute(
+                "SELECT id, run_id, file_path, chunk_index, total_chunks, code_chunk, route FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(worker_id, now + lease_seconds, row[0]) for row in rows]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return [
+            {
+                'id': row[0],
+                'run_id': row[1],
+                'file_path': row[2],
+                'chunk_index': row[3],
+                'total_chunks': row[4],
+                'code_chunk': row[5],
+                'route': Route(**json.loads(row[6])),
+            }
+            for row in rows
+        ]
+
+    def complete(self, task_id, worker_id, result):
+        """
+        Store a result; ignored if the lease was lost to another worker
+        """
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = 'done', result = ?, lease_owner = NULL, error = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (result, task_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error):
+        """
+        Release a task after an error; it is retried until max_attempts
+        """
+        self.conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_owner = NULL, lease_expires = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (self.max_attempts, error, task_id, worker_id)
+        )
+
+    def counts(self, run_id=None):
+        """
+        Number of tasks per status
+        """
+        query = "SELECT status, COUNT(*) FROM tasks"
+        params = ()
+        if run_id:
+            query += " WHERE run_id = ?"
+            params = (run_id,)
+        return dict(self.conn.execute(query + " GROUP BY status", params).fetchall())
+
+    def runs(self):
+        """
+        Run ids with their repository and task counts
+        """
+        return self.conn.execute(
+            "SELECT f.run_id, f.repo_url, COUNT(DISTINCT f.file_path), "
+            "(SELECT COUNT(*) FROM tasks t WHERE t.run_id = f.run_id AND t.status = 'done'), "
+            "(SELECT COUNT(*) FROM tasks t WHERE t.run_id = f.run_id) "
+            "FROM files f GROUP BY f.run_id"
+        ).fetchall()
+
+    def iter_files(self, run_id):
+        """
+        Yield (file_path, content_sha256, complexity_report, route, chunk results)
+        in enqueue order
+        """
+        files = self.conn.execute(
+            "SELECT file_path, content_sha256, complexity FROM files WHERE run_id = ? ORDER BY seq", (run_id,)
+        )
+        for file_path, content_sha256, complexity in files:
+            chunks = self.conn.execute(
+                "SELECT status, result, error, route FROM tasks WHERE run_id = ? AND file_path = ? ORDER BY chunk_index",
+                (run_id, file_path)
+            ).fetchall()
+            results = [
+                result if status == 'done' else f"Error analyzing code chunk: {error or status}"
+                for status, result, error, _ in chunks
+            ]
+            route = Route(**json.loads(chunks[0][3])) if chunks else None
+            yield file_path, content_sha256, json.loads(complexity), route, results
+
+
+def enqueue_repository(analyzer, store, repo_url, run_id=None):
+    """
+    Coordinator: walk the repository and enqueue one task per chunk
+    """
+    run_id = run_id or uuid.uuid4().hex[:12]
+    seq = 0
+    for repo_file in analyzer.iter_repo_files(repo_url):
+        try:
+            content = repo_file.load()
+        except Exception as e:
+            logger.warning(f"Could not load {repo_file.path}: {str(e)}")
+            continue
+
+        complexity_report = analyzer.analyze_code_complexity(content)
+        route = analyzer.router.route_analysis(analyzer._get_laravel_file_type(repo_file.path), complexity_report)
+        chunks = analyzer.split_code_into_chunks(content, analyzer.max_tokens // 2)
+        content_sha256 = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        store.add_file(run_id, seq, repo_url, repo_file.path, complexity_report, chunks, route, content_sha256)
+        seq += 1
+    return run_id, seq
+
+
+def run_worker(analyzer, store, worker_id=None, lease_seconds=300, poll_interval=5.0, exit_when_empty=False):
+    """
+    Worker: claim, analyze and complete tasks until stopped (or the queue drains)
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    processed = 0
+    while True:
+        tasks = store.claim(worker_id, lease_seconds)
+        if not tasks:
+            counts = store.counts()
+            if exit_when_empty and not counts.get('pending') and not counts.get('leased'):
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        for task in tasks:
+            chunk_label = f"{task['file_path']} chunk {task['chunk_index'] + 1}"
+            with request_context(f"task-{task['id']}"), \
+                    log_timing(logger, f"Processed {chunk_label}", worker_id=worker_id) as outcome:
+                result = asyncio.run(analyzer.analyze_laravel_code_chunk(
+                    task['code_chunk'], task['file_path'], task['chunk_index'], task['total_chunks'], task['route']
+                ))
+                # analyze_laravel_code_chunk reports failures as text; retry those
+                if result.startswith("Error analyzing code chunk"):
+                    store.fail(task['id'], worker_id, result)
+                    outcome['status'] = 'retry'
+                    logger.warning(f"{chunk_label} failed, released for retry")
+                elif store.complete(task['id'], worker_id, result):
+                    processed += 1
+                else:
+                    outcome['status'] = 'lease_lost'
+                    logger.warning(f"Lease on {chunk_label} was lost")
+
+
+def assemble_report(analyzer, store, run_id, output_path="laravel_analysis_report.md"):
+    """
+    Combine the stored chunk results per file and write the Markdown report
+    and its structured store
+    """
+    def records():
+        for file_path, content_sha256, complexity_report, route, results in store.iter_files(run_id):
+            yield file_path, {
+                'file_path': file_path,
+                'file_type': analyzer._get_laravel_file_type(file_path),
+                'content_sha256': content_sha256,
+                'has_warnings': any(complexity_report['exceeds_thresholds'].values()),
+                'tier': route.tier if route else None,
+                'model': route.model if route else None,
+                'chunks': len(results),
+                'chunk_errors': sum(r.startswith("Error analyzing code chunk") for r in results),
+                'error': None,
+                'total_lines': complexity_report['total_lines'],
+                'method_count': complexity_report['method_count'],
+                'long_methods': complexity_report['long_methods'],
+                **complexity_report['exceeds_thresholds'],
+                'findings': results,
+                'analysis': analyzer._combine_analyses(results, complexity_report, file_path),
+            }
+
+    return save_analysis_to_file(records(), output_path, run_info={
+        'run_id': run_id,
+        'thresholds': analyzer.complexity_thresholds,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed Laravel analysis work queue")
+    parser.add_argument('--db', default="analysis_queue.sqlite", help="Shared task store")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help="Enqueue a repository's chunks")
+    enqueue.add_argument('repo_url')
+    enqueue.add_argument('--run-id')
+
+    worker = commands.add_parser('worker', help="Process tasks")
+    worker.add_argument('--worker-id')
+    worker.add_argument('--lease', type=int, default=300, help="Lease length in seconds")
+    worker.add_argument('--poll', type=float, default=5.0, help="Seconds between polls when idle")
+    worker.add_argument('--exit-when-empty', action='store_true')
+    worker.add_argument('--cache', help="Shared response cache path")
+
+    commands.add_parser('status', help="Show runs and task counts")
+
+    assemble = commands.add_parser('assemble', help="Write the report for a run")
+    assemble.add_argument('--run-id', required=True)
+    assemble.add_argument('--output', default="laravel_analysis_report.md")
+
+    args = parser.parse_args(argv)
+    store = TaskStore(args.db)
+
+    if args.command == 'status':
+        for run_id, repo_url, files, done, total in store.runs():
+            print(f"{run_id}  {repo_url}  {files} files  {done}/{total} chunks done")
+        print(f"Tasks: {store.counts()}")
+        return
+
+    if not create_default_env():
+        return
+    setup_logging()
+    try:
+        analyzer = LaravelCodeAnalyzer(ConfigurationManager())
+    except ValueError as e:
+        print(f"Configuration Error: {str(e)}")
+        return
+
+    if args.command == 'enqueue':
+        run_id, files = enqueue_repository(analyzer, store, args.repo_url, args.run_id)
+        print(f"Enqueued {files} files as run {run_id}")
+    elif args.command == 'worker':
+        if args.cache:
+            analyzer.response_cache = ResponseCache(args.cache)
+        processed = run_worker(analyzer, store, args.worker_id, args.lease, args.poll, args.exit_when_empty)
+        print(f"Worker finished after {processed} tasks")
+    elif args.command == 'assemble':
+        counts = store.counts(args.run_id)
+        if counts.get('pending') or counts.get('leased'):
+            print(f"Warning: run {args.run_id} is not finished ({counts}); missing chunks are marked as errors")
+        summary = assemble_report(analyzer, store, args.run_id, args.output)
+        print(f"Report for {summary['total_files']} files saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()